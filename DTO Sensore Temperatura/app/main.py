@@ -1,4 +1,15 @@
-from flask import Flask, render_template, send_file
+import os
+
+# Async server mode (threading | eventlet | gevent): green modes must patch before any other import
+ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE") # None = auto-detect
+if ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, render_template, send_file, jsonify
 from flask_socketio import SocketIO
 import numpy as np
 import io
@@ -9,22 +20,34 @@ import pandas as pd
 from datetime import datetime
 from core.dto_engine import TemperatureDTO
 from core.bpa_alert_handler import TemperatureBPA
+from core.model_lifecycle import ModelRegistry, ModelWatcher, TrainingWorker
 
 app = Flask(__name__, template_folder='../templates', static_folder='../static')
 app.config['SECRET_KEY'] = 'dt-factory-ultra-secret'
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
 
 # Initialize DTO and then BPA with DTO reference
 dto = TemperatureDTO(db_path="dto_storage.db", history_size=50)
 bpa = TemperatureBPA(dto_instance=dto)
 
+# Model lifecycle: training runs in a worker process, the twin only hot-swaps snapshots
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+MODEL_RETRAIN_INTERVAL = float(os.getenv("MODEL_RETRAIN_INTERVAL", "30"))
+registry = ModelRegistry(MODEL_DIR)
+watcher = ModelWatcher(registry)
+dto.use_model_watcher(watcher)
+trainer = None
+
 # Global simulation state
 simulation_running = True
+TICK_INTERVAL = float(os.getenv("TICK_INTERVAL", "2"))
 
 def sensor_simulator():
     """Improved simulator with Feedback Loop support."""
     base_temp = 22.0
+    seq, last_tick_ms = 0, 0.0
     while simulation_running:
+        tick_start = time.perf_counter()
         # 1. Physics: Base cycle + noise
         hour = datetime.now().hour
         daily_cycle = 5 * np.sin(np.pi * (hour - 6) / 12)
@@ -56,16 +79,21 @@ def sensor_simulator():
             })
         
         # 6. EMIT: Send data to Chart.js
+        seq += 1
         socketio.emit('new_reading', {
             'temperature': round(float(current_temp), 2),
             'timestamp': datetime.now().strftime('%H:%M:%S'),
             'summary': latest_status,
             'bpa_action': bpa.get_latest_action(),
             'bpa_last_result': bpa_result,
-            'predictions': dto.predict_trend(steps=8)
+            'predictions': dto.predict_trend(steps=8),
+            'seq': seq,
+            'emitted_at': time.time(),
+            'tick_ms': round(last_tick_ms, 2)
         })
         
-        time.sleep(2)
+        last_tick_ms = (time.perf_counter() - tick_start) * 1000
+        time.sleep(max(0.0, TICK_INTERVAL - last_tick_ms / 1000))
 
 @app.route('/')
 def index():
@@ -80,7 +108,34 @@ def get_history():
     conn.close()
     return df.to_json(orient="records")
 
+@app.route('/api/models')
+def get_models():
+    """Model versions, validation metrics and the version served by the live twin."""
+    manifest = registry.manifest()
+    return jsonify({"serving": dto.model_version, **manifest, "pinned": bool(manifest.get("pinned"))})
+
+@app.route('/api/models/rollback', methods=['POST'])
+def rollback_model():
+    try:
+        version = registry.rollback()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "success", "current": version})
+
+@app.route('/api/models/retrain', methods=['POST'])
+def retrain_model():
+    """Forces a retrain; also lifts the pin left by a rollback."""
+    if trainer is None:
+        return jsonify({"status": "error", "message": "Training worker not running"}), 503
+    registry.unpin()
+    trainer.request_retrain()
+    return jsonify({"status": "success"})
+
 if __name__ == '__main__':
+    trainer = TrainingWorker("dto_storage.db", MODEL_DIR, interval=MODEL_RETRAIN_INTERVAL).start()
+    dto.on_drift = trainer.request_retrain
+    watcher.start()
+
     sim_thread = threading.Thread(target=sensor_simulator)
     sim_thread.daemon = True
     sim_thread.start()
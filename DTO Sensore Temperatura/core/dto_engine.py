@@ -1,7 +1,5 @@
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import IsolationForest
-from sklearn.linear_model import LinearRegression
 from datetime import datetime, timedelta
 import sqlite3
 import os
@@ -11,8 +9,14 @@ class TemperatureDTO:
         self.history_size = history_size
         self.db_path = db_path
         self.data = pd.DataFrame(columns=['timestamp', 'temperature', 'is_anomaly'])
-        self.model_anomaly = IsolationForest(contamination=0.1)
-        self.model_trend = LinearRegression()
+        
+        # ML models are trained by a background worker and hot-swapped between ticks
+        self.models = None
+        self.model_version = None
+        self.model_watcher = None
+        self.on_drift = None          # callback asking the trainer for a new model
+        self.drift_window = 20
+        self._last_drift_signal = 0.0
         
         # Internal state for closed-loop
         self.external_influence = 0.0 # Used by BPA to lower/raise temp
@@ -52,15 +56,42 @@ class TemperatureDTO:
         except Exception as e:
             print(f"Error loading DB: {e}")
 
+    def use_model_watcher(self, watcher, on_drift=None):
+        """Connects the twin to the model lifecycle (ModelWatcher + TrainingWorker)."""
+        self.model_watcher = watcher
+        self.on_drift = on_drift
+
+    def swap_models(self):
+        """Atomic hot-swap: takes the bundle already loaded by the watcher, if any."""
+        if self.model_watcher is None:
+            return
+        pending = self.model_watcher.take()
+        if pending is not None:
+            self.model_version, self.models = pending
+            print(f"DTO MODEL SWAP: now serving v{self.model_version}")
+
+    def check_drift(self, cooldown=30.0):
+        """Mean shift of the recent readings vs. the training data triggers a retrain."""
+        if self.models is None or self.on_drift is None or len(self.data) < self.drift_window:
+            return False
+        recent = self.data['temperature'].tail(self.drift_window).astype(float)
+        z = abs(recent.mean() - self.models['train_mean']) / (self.models['train_std'] / np.sqrt(self.drift_window))
+        anomaly_rate = self.data['is_anomaly'].tail(self.drift_window).astype(bool).mean()
+        drifted = z > 4.0 or anomaly_rate > 3 * self.models['contamination']
+        now = datetime.now().timestamp()
+        if drifted and now - self._last_drift_signal > cooldown:
+            self._last_drift_signal = now
+            self.on_drift()
+        return drifted
+
     def add_reading(self, temperature):
+        self.swap_models()
         timestamp = datetime.now()
         new_row = {'timestamp': timestamp, 'temperature': temperature, 'is_anomaly': False}
         
-        # Check for anomaly if we have enough data (at least 20 samples)
-        if len(self.data) > 20:
-            X = self.data['temperature'].values.reshape(-1, 1)
-            self.model_anomaly.fit(X)
-            prediction = self.model_anomaly.predict([[temperature]])
+        # Inference only: the model is (re)trained out of process
+        if self.models is not None:
+            prediction = self.models['anomaly'].predict([[temperature]])
             new_row['is_anomaly'] = True if prediction[0] == -1 else False
         
         # Append to memory
@@ -72,6 +103,8 @@ class TemperatureDTO:
         # Keep only latest history in memory for performance
         if len(self.data) > self.history_size:
             self.data = self.data.iloc[-self.history_size:]
+        
+        self.check_drift()
             
     def _save_to_db(self, ts, temp, is_anomaly):
         try:
@@ -87,15 +120,12 @@ class TemperatureDTO:
             print(f"Error saving to DB: {e}")
 
     def predict_trend(self, steps=10):
-        if len(self.data) < 10:
+        if self.models is None or self.data.empty:
             return None
         
-        X = np.array(range(len(self.data))).reshape(-1, 1)
-        y = self.data['temperature'].values
-        self.model_trend.fit(X, y)
-        
-        future_X = np.array(range(len(self.data), len(self.data) + steps)).reshape(-1, 1)
-        future_y = self.model_trend.predict(future_X)
+        last_t = pd.Timestamp(self.data['timestamp'].iloc[-1]).timestamp() - self.models['trend_t0']
+        future_X = (last_t + self.models['trend_step'] * np.arange(1, steps + 1)).reshape(-1, 1)
+        future_y = self.models['trend'].predict(future_X)
         
         return future_y.tolist()
 
@@ -124,5 +154,6 @@ class TemperatureDTO:
             "status": self.get_status(),
             "history_count": len(self.data),
             "anomalies_count": int(self.data['is_anomaly'].sum()),
-            "sma": self.get_sma()
+            "sma": self.get_sma(),
+            "model_version": self.model_version
         }
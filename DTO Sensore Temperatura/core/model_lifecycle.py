@@ -0,0 +1,356 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import multiprocessing as mp
+from contextlib import contextmanager
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.linear_model import LinearRegression
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_file(f):
+    """Blocking exclusive lock: flock on POSIX, a 1-byte msvcrt lock on Windows."""
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:  # LK_LOCK gives up after ~10 s: keep waiting
+            pass
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ModelRegistry:
+    """
+    Versioned model snapshots on disk.
+    Each version is a joblib file; `manifest.json` points to the live one and is
+    replaced atomically (write + os.replace), so readers never see a half-written
+    model. Writers (trainer process, API rollback) serialize their
+    read-modify-write on a locked `manifest.lock` (flock / msvcrt).
+    Rollback moves the pointer back to the previous accepted version and pins
+    it: publish() refuses new versions until unpin(), otherwise the next
+    scheduled retrain would put the rejected model family straight back.
+    """
+    MANIFEST = "manifest.json"
+    LOCK = "manifest.lock"
+
+    def __init__(self, model_dir="models", keep=10):
+        self.model_dir = model_dir
+        self.keep = keep
+        os.makedirs(model_dir, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.model_dir, name)
+
+    def manifest(self):
+        try:
+            with open(self._path(self.MANIFEST)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"current": None, "versions": [], "pinned": False}
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock across processes and threads (one open file description each)."""
+        with open(self._path(self.LOCK), "a+") as f:
+            _lock_file(f)
+            try:
+                yield
+            finally:
+                _unlock_file(f)
+
+    def _write_manifest(self, manifest):
+        tmp = self._path(self.MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self._path(self.MANIFEST))
+
+    def current_version(self):
+        return self.manifest()["current"]
+
+    def pinned(self):
+        return bool(self.manifest().get("pinned"))
+
+    def publish(self, bundle, metrics):
+        """
+        Stores a validated bundle as a new version and makes it live.
+        Returns None, without writing anything, while a rollback pin is set.
+        """
+        with self._locked():
+            manifest = self.manifest()
+            if manifest.get("pinned"):
+                return None
+            version = max([v["version"] for v in manifest["versions"]], default=0) + 1
+            filename = f"model_v{version:04d}.joblib"
+            tmp = self._path(filename + ".tmp")
+            joblib.dump(bundle, tmp)
+            os.replace(tmp, self._path(filename))
+
+            manifest["versions"].append({"version": version, "file": filename,
+                                         "created": datetime.now().isoformat(), "metrics": metrics})
+            manifest["current"] = version
+            # Prune old snapshots, never the live one
+            while len(manifest["versions"]) > self.keep:
+                old = next(v for v in manifest["versions"] if v["version"] != version)
+                manifest["versions"].remove(old)
+                try:
+                    os.remove(self._path(old["file"]))
+                except FileNotFoundError:
+                    pass
+            self._write_manifest(manifest)
+        return version
+
+    def load(self, version):
+        entry = next(v for v in self.manifest()["versions"] if v["version"] == version)
+        return joblib.load(self._path(entry["file"]))
+
+    def rollback(self):
+        """Makes the version published before the current one live again and pins it."""
+        with self._locked():
+            manifest = self.manifest()
+            versions = [v["version"] for v in manifest["versions"]]
+            if manifest["current"] not in versions or versions.index(manifest["current"]) == 0:
+                raise ValueError("No previous model version to roll back to")
+            manifest["current"] = versions[versions.index(manifest["current"]) - 1]
+            manifest["pinned"] = True
+            self._write_manifest(manifest)
+        return manifest["current"]
+
+    def unpin(self):
+        """Lets the trainer publish again after a rollback."""
+        with self._locked():
+            manifest = self.manifest()
+            manifest["pinned"] = False
+            self._write_manifest(manifest)
+
+
+# --- Training ---------------------------------------------------------------
+def load_training_data(db_path, window=2000):
+    """Latest `window` readings from the persistent store, oldest first."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT timestamp, temperature FROM readings ORDER BY id DESC LIMIT ?",
+                            (window,)).fetchall()
+    finally:
+        conn.close()
+    rows.reverse()
+    ts = np.array([datetime.fromisoformat(t).timestamp() for t, _ in rows])
+    temps = np.array([v for _, v in rows], dtype=float)
+    return ts, temps
+
+
+def fit_bundle(ts, temps, contamination=0.1, trend_window=50):
+    anomaly = IsolationForest(contamination=contamination, random_state=42).fit(temps.reshape(-1, 1))
+    t0 = ts[-trend_window:][0]
+    x = (ts[-trend_window:] - t0).reshape(-1, 1)
+    trend = LinearRegression().fit(x, temps[-trend_window:])
+    return {
+        "anomaly": anomaly,
+        "trend": trend,
+        "trend_t0": float(t0),
+        "trend_step": float(np.median(np.diff(ts[-trend_window:]))) if len(ts) > 1 else 1.0,
+        "train_mean": float(temps.mean()),
+        "train_std": float(temps.std() + 1e-9),
+        "contamination": contamination,
+        "rows": int(len(temps)),
+        "trained_until": float(ts[-1]),
+        "trained_at": datetime.now().isoformat(),
+    }
+
+
+def _trend_mae(bundle, ts, temps):
+    x = (ts - bundle["trend_t0"]).reshape(-1, 1)
+    return float(np.mean(np.abs(bundle["trend"].predict(x) - temps)))
+
+
+def _trained_until(bundle):
+    """Timestamp of the newest row the bundle was fitted on (older bundles: fit time)."""
+    if "trained_until" in bundle:
+        return bundle["trained_until"]
+    return datetime.fromisoformat(bundle["trained_at"]).timestamp()
+
+
+def train_and_validate(db_path, current=None, window=2000, holdout=0.2, contamination=0.1,
+                       max_rate_ratio=2.0, max_mae_ratio=1.25, min_compare_rows=5, min_rows=40, seed=0):
+    """
+    Fits a candidate on a random split of the window, checks it on the held
+    out rows, then refits on the whole window for publishing.
+    The split is random, not chronological: the simulated temperature moves
+    in hourly steps, and a step in the last minutes of the window would make
+    a chronological holdout look anomalous exactly when a retrain is needed.
+    - Anomaly model: the holdout anomaly rate must stay within
+      `max_rate_ratio` x the configured `contamination`, plus two binomial
+      standard errors so a small holdout is not rejected on sampling noise.
+    - Live model: compared only on held-out rows newer than the data it was
+      trained on, where both models are out of sample. A noisy candidate is
+      still accepted when the live model does even worse there; its trend
+      must not be worse by more than `max_mae_ratio`.
+    Returns (bundle or None, metrics).
+    """
+    ts, temps = load_training_data(db_path, window)
+    if len(temps) < min_rows:
+        return None, {"accepted": False, "reason": f"only {len(temps)} rows"}
+
+    test = np.random.default_rng(seed).random(len(temps)) < holdout
+    candidate = fit_bundle(ts[~test], temps[~test], contamination=contamination)
+    h_ts, h_temps = ts[test], temps[test]
+    anomaly_rate = float(np.mean(candidate["anomaly"].predict(h_temps.reshape(-1, 1)) == -1))
+    # The trend line is only meant for the span it was fitted on and a few steps past it
+    in_span = h_ts >= candidate["trend_t0"]
+    max_rate = contamination * max_rate_ratio + 2 * np.sqrt(contamination * (1 - contamination) / max(len(h_temps), 1))
+    metrics = {"rows": int(len(temps)), "holdout_anomaly_rate": round(anomaly_rate, 4),
+               "max_anomaly_rate": round(float(max_rate), 4)}
+    if in_span.any():
+        metrics["holdout_trend_mae"] = round(_trend_mae(candidate, h_ts[in_span], h_temps[in_span]), 4)
+
+    current_rate = None
+    fresh = (h_ts > _trained_until(current)) & in_span if current is not None else np.zeros(len(h_ts), bool)
+    if fresh.sum() >= min_compare_rows:
+        f_temps = h_temps[fresh].reshape(-1, 1)
+        current_rate = float(np.mean(current["anomaly"].predict(f_temps) == -1))
+        metrics["fresh_rows"] = int(fresh.sum())
+        metrics["fresh_anomaly_rate"] = round(float(np.mean(candidate["anomaly"].predict(f_temps) == -1)), 4)
+        metrics["current_fresh_anomaly_rate"] = round(current_rate, 4)
+
+    if anomaly_rate > max_rate and (
+            current_rate is None or metrics["fresh_anomaly_rate"] >= current_rate):
+        return None, {**metrics, "accepted": False, "reason": "holdout anomaly rate too high"}
+    if current_rate is not None:
+        mae = _trend_mae(candidate, h_ts[fresh], h_temps[fresh])
+        current_mae = _trend_mae(current, h_ts[fresh], h_temps[fresh])
+        metrics["fresh_trend_mae"] = round(mae, 4)
+        metrics["current_fresh_trend_mae"] = round(current_mae, 4)
+        if mae > current_mae * max_mae_ratio:
+            return None, {**metrics, "accepted": False, "reason": "trend worse than live model"}
+
+    return fit_bundle(ts, temps, contamination=contamination), {**metrics, "accepted": True}
+
+
+def training_loop(db_path, model_dir, interval, drift_event, stop_event, window=2000):
+    """Worker process: retrain on schedule or as soon as the live twin signals drift."""
+    registry = ModelRegistry(model_dir)
+    while not stop_event.is_set():
+        reason = "drift" if drift_event.wait(timeout=interval) else "schedule"
+        drift_event.clear()
+        if stop_event.is_set():
+            break
+        if registry.pinned():
+            print(f"🧠 MODEL retrain skipped ({reason}): v{registry.current_version()} pinned by rollback")
+            continue
+        try:
+            version = registry.current_version()
+            current = registry.load(version) if version else None
+            bundle, metrics = train_and_validate(db_path, current, window=window)
+            metrics["trigger"] = reason
+            if bundle is not None:
+                version = registry.publish(bundle, metrics)
+                if version is None:
+                    print(f"🧠 MODEL candidate discarded ({reason}): a rollback pinned the live version")
+                else:
+                    print(f"🧠 MODEL v{version} published ({reason}): {metrics}")
+            else:
+                print(f"🧠 MODEL candidate rejected ({reason}): {metrics}")
+        except Exception as e:
+            print(f"Training error: {e}")
+
+
+@contextmanager
+def _spawn_main(module_name):
+    """
+    spawn re-imports the parent's __main__ in the child: pointed at the app
+    script, the trainer would rebuild the Flask app, the twin and its SQLite
+    connection (and monkey-patch under eventlet/gevent). Presenting this module
+    as __main__ while the process starts makes the child import only it.
+    """
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = sys.modules[module_name]
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+class TrainingWorker:
+    """Runs `training_loop` in a separate process so fits never block the sensing loop."""
+    def __init__(self, db_path, model_dir="models", interval=60.0, window=2000):
+        ctx = mp.get_context("spawn")
+        self.drift_event = ctx.Event()
+        self.stop_event = ctx.Event()
+        self.process = ctx.Process(target=training_loop, daemon=True, name="dto-model-trainer",
+                                   args=(db_path, model_dir, interval, self.drift_event, self.stop_event, window))
+
+    def start(self):
+        with _spawn_main(__name__):
+            self.process.start()
+        # Train once right away instead of waiting for the first interval
+        self.drift_event.set()
+        return self
+
+    def request_retrain(self):
+        self.drift_event.set()
+
+    def stop(self):
+        self.stop_event.set()
+        self.drift_event.set()
+        self.process.join(timeout=10)
+
+
+class ModelWatcher:
+    """
+    Loads newly published versions off the hot path. The live twin only picks
+    up the already-deserialized bundle between ticks (a reference swap).
+    """
+    def __init__(self, registry, poll_interval=1.0):
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self.loaded_version = None
+        self.pending = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                version = self.registry.current_version()
+                if version is not None and version != self.loaded_version:
+                    bundle = self.registry.load(version)
+                    with self._lock:
+                        self.pending = (version, bundle)
+                    self.loaded_version = version
+            except Exception as e:
+                print(f"Model watcher error: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def take(self):
+        """Returns (version, bundle) once per new version, else None."""
+        with self._lock:
+            pending, self.pending = self.pending, None
+        return pending
+
+    def stop(self):
+        self._stop.set()
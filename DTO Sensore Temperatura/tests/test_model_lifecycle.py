@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from core.model_lifecycle import ModelRegistry, train_and_validate, training_loop
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _readings_db(path, n=200):
+    rng = np.random.default_rng(0)
+    start = datetime(2026, 9, 1)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE readings (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, temperature REAL)")
+    conn.executemany("INSERT INTO readings (timestamp, temperature) VALUES (?, ?)",
+                     [((start + timedelta(seconds=2 * i)).isoformat(), 22.0 + rng.normal(0, 0.3)) for i in range(n)])
+    conn.commit()
+    conn.close()
+
+
+def _app_signal_db(path, end, n=2000, seed=0):
+    """The live simulator's signal (app/main.py): hourly daily-cycle step, noise, 5% spikes, 2 s ticks."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        t = end - timedelta(seconds=2 * (n - 1 - i))
+        temp = 22.0 + 5 * np.sin(np.pi * (t.hour - 6) / 12) + rng.uniform(-0.3, 0.3)
+        if rng.random() < 0.05:
+            temp += rng.uniform(5.0, 10.0) * (1 if rng.random() > 0.4 else -1)
+        rows.append((t.isoformat(), float(temp)))
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS readings (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, temperature REAL)")
+    conn.executemany("INSERT INTO readings (timestamp, temperature) VALUES (?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def _bundle(i):
+    return {"id": i}
+
+
+def test_publish_makes_each_version_live_and_prunes_old_snapshots(tmp_path):
+    registry = ModelRegistry(str(tmp_path), keep=3)
+    for i in range(1, 6):
+        assert registry.publish(_bundle(i), {"accepted": True}) == i
+
+    manifest = registry.manifest()
+    assert manifest["current"] == 5
+    assert [v["version"] for v in manifest["versions"]] == [3, 4, 5]
+    assert sorted(f for f in os.listdir(tmp_path) if f.endswith(".joblib")) == \
+        ["model_v0003.joblib", "model_v0004.joblib", "model_v0005.joblib"]
+    assert registry.load(5) == {"id": 5}
+
+
+def test_rollback_pins_the_previous_version_until_unpin(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    registry.publish(_bundle(1), {})
+    registry.publish(_bundle(2), {})
+
+    assert registry.rollback() == 1
+    assert registry.pinned()
+    assert registry.publish(_bundle(3), {}) is None  # the next retrain can't undo the rollback
+    assert registry.current_version() == 1
+    assert not any(f.startswith("model_v0003") for f in os.listdir(tmp_path))
+
+    registry.unpin()
+    assert registry.publish(_bundle(3), {}) == 3
+    assert registry.current_version() == 3
+
+
+def test_rollback_without_a_previous_version_is_refused(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    registry.publish(_bundle(1), {})
+    try:
+        registry.rollback()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("rollback past the first version must fail")
+    assert not registry.pinned()
+
+
+def test_concurrent_publishers_never_lose_a_version(tmp_path):
+    registries = [ModelRegistry(str(tmp_path), keep=100) for _ in range(4)]
+    threads = [threading.Thread(target=lambda r=r: [r.publish(_bundle(0), {}) for _ in range(10)])
+               for r in registries]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [v["version"] for v in registries[0].manifest()["versions"]] == list(range(1, 41))
+
+
+def test_training_loop_skips_while_pinned(tmp_path):
+    db, models = str(tmp_path / "dto.db"), str(tmp_path / "models")
+    _readings_db(db)
+    registry = ModelRegistry(models)
+    registry.publish(_bundle(1), {})
+    registry.publish(_bundle(2), {})
+    registry.rollback()
+
+    drift, stop = threading.Event(), threading.Event()
+    worker = threading.Thread(target=training_loop, args=(db, models, 0.05, drift, stop))
+    worker.start()
+    drift.set()
+    threading.Event().wait(0.5)
+    stop.set()
+    worker.join()
+    assert registry.current_version() == 1
+    assert [v["version"] for v in registry.manifest()["versions"]] == [1, 2]
+
+
+def test_trainer_process_does_not_reimport_the_app_script(tmp_path):
+    db, models, marker = str(tmp_path / "dto.db"), str(tmp_path / "models"), str(tmp_path / "reimported")
+    _readings_db(db)
+    script = tmp_path / "app_main.py"
+    script.write_text(textwrap.dedent(f"""
+        import sys, time
+        sys.path.insert(0, {ROOT!r})
+        if __name__ != "__main__":
+            open({marker!r}, "w").write(__name__)
+        from core.model_lifecycle import ModelRegistry, TrainingWorker
+
+        if __name__ == "__main__":
+            worker = TrainingWorker({db!r}, {models!r}, interval=60).start()
+            registry = ModelRegistry({models!r})
+            deadline = time.time() + 60
+            while registry.current_version() is None and time.time() < deadline:
+                time.sleep(0.2)
+            worker.stop()
+            print(registry.current_version())
+    """))
+    out = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip().splitlines()[-1] == "1"
+    assert not os.path.exists(marker)
+
+
+def test_cold_start_is_accepted_right_after_an_hourly_step(tmp_path):
+    db = str(tmp_path / "dto.db")
+    _app_signal_db(db, end=datetime(2026, 9, 1, 9, 5))  # the 09:00 step is in the last 5 minutes
+    bundle, metrics = train_and_validate(db)
+    assert metrics["accepted"], metrics
+    assert bundle is not None and metrics["holdout_anomaly_rate"] <= metrics["max_anomaly_rate"]
+
+
+def test_live_model_is_compared_only_on_rows_it_never_saw(tmp_path):
+    db = str(tmp_path / "dto.db")
+    _app_signal_db(db, end=datetime(2026, 9, 1, 8, 58))
+    live, _ = train_and_validate(db)
+    # Same window: nothing newer than the live model's data, so no comparison
+    _, metrics = train_and_validate(db, live)
+    assert metrics["accepted"] and "fresh_rows" not in metrics
+
+    # 20 minutes later, across the 09:00 step: the retrain the drift signal asks for
+    _app_signal_db(db, end=datetime(2026, 9, 1, 9, 18), n=600, seed=1)
+    bundle, metrics = train_and_validate(db, live)
+    assert metrics["accepted"], metrics
+    assert metrics["fresh_rows"] >= 5
+    assert metrics["current_fresh_anomaly_rate"] > metrics["fresh_anomaly_rate"]
+    assert bundle["trained_until"] > live["trained_until"]
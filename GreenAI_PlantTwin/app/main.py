@@ -1,3 +1,14 @@
+import os
+
+# Async server mode (threading | eventlet | gevent): green modes must patch before any other import
+ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+if ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
 from flask import Flask, render_template, jsonify, request
 from flask_socketio import SocketIO
 import threading
@@ -5,10 +16,11 @@ import time
 from core.plant_engine import PlantDT
 
 app = Flask(__name__, template_folder='../templates')
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
 
 # Initialize the Bio-Twin
 plant = PlantDT("Super-Sustainer Fern")
+TICK_INTERVAL = float(os.getenv("TICK_INTERVAL", "1.5"))
 
 @app.route('/')
 def index():
@@ -31,7 +43,9 @@ def fertilize():
 def background_bio_loop():
     """Continuous simulation thread."""
     print("🌿 Bio-Twin High-Fidelity Simulation loop started.")
+    seq, last_tick_ms = 0, 0.0
     while True:
+        tick_start = time.perf_counter()
         state = plant.simulate_tick()
         
         # Smart BPA Logic: Low Nutrients or Low Moisture
@@ -42,8 +56,11 @@ def background_bio_loop():
         if state['nutrients'] < 15:
             socketio.emit('bpa_alert', {"message": "Nutrient Depletion! Model indicates growth stunted."})
             
+        seq += 1
+        state.update(seq=seq, emitted_at=time.time(), tick_ms=round(last_tick_ms, 2))
         socketio.emit('bio_update', state)
-        time.sleep(1.5)
+        last_tick_ms = (time.perf_counter() - tick_start) * 1000
+        time.sleep(max(0.0, TICK_INTERVAL - last_tick_ms / 1000))
 
 if __name__ == '__main__':
     socketio.start_background_task(background_bio_loop)
@@ -1,11 +1,13 @@
 import time
 import random
+import sqlite3
 import numpy as np
 from datetime import datetime
 
 class PlantDT:
-    def __init__(self, plant_type="Digital Fern"):
+    def __init__(self, plant_type="Digital Fern", db_path="plant_twin.db"):
         self.plant_type = plant_type
+        self.db_path = db_path
         # Physical State
         self.soil_moisture = 60.0 # Percentage
         self.humidity = 45.0      # Air humidity
@@ -23,6 +25,39 @@ class PlantDT:
         
         self.last_update = time.time()
         self.is_watering = False
+        self._init_db()
+
+    def _init_db(self):
+        """Persistent history of bio-states (source for the columnar export)."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS plant_states (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                soil_moisture REAL,
+                humidity REAL,
+                nutrients REAL,
+                health REAL,
+                growth_stage REAL,
+                light REAL,
+                temperature REAL,
+                status TEXT
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _log_state(self, state):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO plant_states (timestamp, soil_moisture, humidity, nutrients, health, growth_stage, light, temperature, status) VALUES (?,?,?,?,?,?,?,?,?)",
+            (datetime.now().isoformat(), state['soil_moisture'], state['humidity'], state['nutrients'],
+             state['health'], state['growth_stage'], state['light'], state['temp'], state['status'])
+        )
+        conn.commit()
+        conn.close()
 
     def simulate_tick(self):
         """Biological Simulation Step."""
@@ -58,7 +93,9 @@ class PlantDT:
              self.growth_stage = float(max(0.0, self.growth_stage - 0.1))
 
         self.last_update = now
-        return self.get_state()
+        state = self.get_state()
+        self._log_state(state)
+        return state
 
     def irrigate(self):
         """Actuator command: Water the plant."""
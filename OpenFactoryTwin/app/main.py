@@ -1,12 +1,26 @@
+import os
+
+# Async server mode (threading | eventlet | gevent): green modes must patch before any other import
+ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+if ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
 from flask import Flask, render_template, request, jsonify
 from flask_socketio import SocketIO
+import math
 import time
 from core.factory_engine import FactoryTwin
 
 app = Flask(__name__, template_folder='../templates')
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
 
 twin = FactoryTwin()
+twin.tick_interval = float(os.getenv("TICK_INTERVAL", twin.tick_interval))
+tick_seq = 0
 
 @app.route('/')
 def index():
@@ -14,7 +28,21 @@ def index():
 
 @app.route('/api/state')
 def get_state():
-    return jsonify(twin.get_factory_state())
+    window = request.args.get('window')
+    if window is not None and window not in twin.kpi.windows:
+        return jsonify({"error": f"unknown window, use one of {list(twin.kpi.windows)}"}), 400
+    return jsonify(twin.get_factory_state(window))
+
+@app.route('/api/kpi')
+def get_kpi():
+    """Windowed KPIs (production, energy, OEE, sustainability); ?window=1m|15m|shift|day|lifetime, ?machines=0 for factory only."""
+    machines = request.args.get('machines', '1') != '0'
+    window = request.args.get('window')
+    if window is None:
+        return jsonify({w: twin.kpi.report(w, machines) for w in twin.kpi.windows})
+    if window not in twin.kpi.windows:
+        return jsonify({"error": f"unknown window, use one of {list(twin.kpi.windows)}"}), 400
+    return jsonify(twin.kpi.report(window, machines))
 
 @app.route('/api/optimize', methods=['POST'])
 def optimize():
@@ -32,12 +60,60 @@ def optimize():
     socketio.emit('bpa_log', {"message": f"Optimization Applied: {action}", "speed": twin.factory_speed})
     return jsonify({"status": "success", "new_speed": twin.factory_speed})
 
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def _scheduler_payload_error(data):
+    """Returns why a /api/scheduler POST body is invalid, or None."""
+    if not isinstance(data, dict):
+        return "expected a JSON object"
+    if "energy_limit" in data and not _is_number(data["energy_limit"]):
+        return "energy_limit must be a number (kW)"
+    if "price_curve" in data:
+        curve = data["price_curve"]
+        if not isinstance(curve, list) or len(curve) != 24 or not all(_is_number(p) for p in curve):
+            return "price_curve must be a list of 24 hourly prices"
+    if "max_price" in data and data["max_price"] is not None:
+        if not _is_number(data["max_price"]) or data["max_price"] <= 0:
+            return "max_price must be a positive number or null"
+    return None
+
+@app.route('/api/scheduler', methods=['GET', 'POST'])
+def scheduler():
+    """Power-cap scheduler report; POST moves the cap or sets a time-of-use price curve."""
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        error = _scheduler_payload_error(data)
+        if error:
+            # Bad values would only blow up later inside the simulation thread
+            return jsonify({"error": error}), 400
+        if "energy_limit" in data:
+            twin.set_energy_limit(data["energy_limit"])
+        if "price_curve" in data:
+            twin.scheduler.price_curve = [float(p) for p in data["price_curve"]]
+        if "max_price" in data:
+            twin.scheduler.max_price = data["max_price"]
+        socketio.emit('bpa_log', {"message": f"Power cap set to {twin.energy_limit} kW", "speed": twin.factory_speed})
+    return jsonify({"energy_limit": twin.energy_limit, **twin.scheduler.get_report()})
+
+@app.route('/api/energy_baselines')
+def energy_baselines():
+    """Learned per-machine power baselines by state, plus anomaly counters."""
+    return jsonify({**twin.energy_monitor.stats, "baselines": twin.energy_monitor.get_baselines()})
+
 def background_simulation():
     """Background task for factory simulation."""
     print("🧵 Background Simulation Thread Started")
     
     def broadcast_state(state):
+        global tick_seq
+        tick_seq += 1
+        state['seq'] = tick_seq
+        state['emitted_at'] = time.time()
         socketio.emit('factory_update', state)
+        for event in state['energy_anomalies']:
+            print(f"⚡ {event['type']} on {event['machine_id']} ({event['state']}): {event['consumption']} kW vs {event['baseline_kw']} kW")
+            socketio.emit('energy_anomaly', event)
 
     twin.run_simulation_loop(broadcast_state)
 
@@ -0,0 +1,55 @@
+"""
+KPIEngine benchmark: per-tick update cost against machine count and run length
+(a constant cost over a simulated day shows the windows never re-scan history).
+
+    PYTHONPATH=. python benchmarks/kpi_bench.py --machines 10 100 300 1000 --hours 24
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from core.factory_engine import Machine
+from core.kpi_engine import KPIEngine
+
+
+def run(n, hours, seed=0):
+    random.seed(seed)
+    ids = [f"M{i + 1}" for i in range(n)]
+    engine = KPIEngine(ids, Machine("M", "bench").nominal_kwh_per_unit())
+    energy, production = np.zeros(n), np.zeros(n)
+    now = time.time()
+    first_hour, last_hour = [], []
+    ticks = hours * 3600
+    for t in range(ticks):
+        statuses = [random.choice(("IDLE", "WORKING")) for _ in ids]
+        energy += np.where(np.array(statuses) == "WORKING", 5.0, 0.5) / 3600
+        production += np.random.rand(n) < 0.12
+        t0 = time.perf_counter()
+        engine.update(ids, statuses, energy, production, now=now + t)
+        ms = (time.perf_counter() - t0) * 1000
+        if t < 3600:
+            first_hour.append(ms)
+        elif t >= ticks - 3600:
+            last_hour.append(ms)
+    t0 = time.perf_counter()
+    engine.report("15m", now=now + ticks)
+    return first_hour, last_hour or first_hour, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Windowed KPI engine benchmark")
+    parser.add_argument("--machines", type=int, nargs="+", default=[10, 100, 300, 1000])
+    parser.add_argument("--hours", type=int, default=24)
+    args = parser.parse_args()
+
+    print(f"{'machines':>8} | {'p50 ms 1st h':>12} | {'p50 ms last h':>13} | {'p99 ms':>7} | {'report ms':>9}")
+    for n in args.machines:
+        first, last, report_ms = run(n, args.hours)
+        print(f"{n:>8} | {np.percentile(first, 50):>12.3f} | {np.percentile(last, 50):>13.3f} | "
+              f"{np.percentile(first + last, 99):>7.3f} | {report_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import time
+import numpy as np
+from datetime import datetime
+
+STATES = ("IDLE", "WORKING", "BLOCKED", "MAINTENANCE")
+STATE_INDEX = {s: i for i, s in enumerate(STATES)}
+
+
+class EnergyAnomalyMonitor:
+    """
+    Vectorized per-machine power monitoring.
+    For every (machine, state) pair it learns a power baseline online (exact
+    mean/variance during warm-up, then a slow EWMA) and checks each new sample:
+      - SPIKE: the draw is `spike_z` sigmas (and `min_spike_kw`) away from the
+        baseline of the state the machine is in, e.g. WORKING far above
+        energy_consumption_working;
+      - DRIFT: a two-sided CUSUM on the standardized residuals accumulates past
+        `cusum_h`, e.g. an IDLE draw creeping up with wear.
+    Meters are sample-and-hold (a work cycle keeps the same draw for several
+    ticks), so only fresh readings - different from the machine's previous
+    one - are tested; repeats would break the CUSUM independence assumption
+    and report the same spike once per tick (the baseline learns from fresh
+    readings too, so long cycles do not shrink the learned sigma).
+    All machines are processed with numpy array operations, so the cost of a
+    tick does not grow with per-machine Python work.
+    """
+    def __init__(self, machine_ids, alpha=0.01, warmup=30, spike_z=6.0, min_spike_kw=0.5,
+                 cusum_k=0.5, cusum_h=10.0, min_sigma=0.05):
+        self.alpha = alpha
+        self.warmup = warmup
+        self.spike_z = spike_z
+        self.min_spike_kw = min_spike_kw
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.min_sigma = min_sigma
+        self.machine_ids = []
+        self.index = {}
+        shape = (0, len(STATES))
+        self.count = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self.var = np.zeros(shape)
+        self.cusum_pos = np.zeros(shape)
+        self.cusum_neg = np.zeros(shape)
+        self.last_power = np.full(0, np.nan)
+        self.stats = {"spikes": 0, "drifts": 0, "last_update_ms": 0.0}
+        self.add_machines(machine_ids)
+
+    def add_machines(self, machine_ids):
+        new = [mid for mid in machine_ids if mid not in self.index]
+        if not new:
+            return
+        for mid in new:
+            self.index[mid] = len(self.machine_ids)
+            self.machine_ids.append(mid)
+        pad = np.zeros((len(new), len(STATES)))
+        self.count, self.mean, self.var, self.cusum_pos, self.cusum_neg = (
+            np.vstack([a, pad]) for a in (self.count, self.mean, self.var, self.cusum_pos, self.cusum_neg))
+        self.last_power = np.concatenate([self.last_power, np.full(len(new), np.nan)])
+
+    def update(self, machine_ids, statuses, power):
+        """
+        One tick for all machines. `machine_ids`, `statuses` and `power` are
+        parallel sequences. Returns the list of anomaly events of this tick.
+        """
+        t0 = time.perf_counter()
+        self.add_machines(machine_ids)
+        rows = np.fromiter((self.index[mid] for mid in machine_ids), dtype=np.intp, count=len(machine_ids))
+        cols = np.fromiter((STATE_INDEX[s] for s in statuses), dtype=np.intp, count=len(statuses))
+        x = np.asarray(power, dtype=float)
+
+        n = self.count[rows, cols]
+        mu = self.mean[rows, cols]
+        var = self.var[rows, cols]
+        sigma = np.maximum(np.sqrt(var), self.min_sigma)
+        z = (x - mu) / sigma
+        ready = n >= self.warmup
+        fresh = x != self.last_power[rows]
+        self.last_power[rows] = x
+
+        spike = ready & fresh & (np.abs(z) > self.spike_z) & (np.abs(x - mu) > self.min_spike_kw)
+
+        # CUSUM on standardized residuals (spikes are excluded so they don't look like drift)
+        track = ready & fresh & ~spike
+        pos = np.where(track, np.maximum(0.0, self.cusum_pos[rows, cols] + z - self.cusum_k), self.cusum_pos[rows, cols])
+        neg = np.where(track, np.maximum(0.0, self.cusum_neg[rows, cols] - z - self.cusum_k), self.cusum_neg[rows, cols])
+        drift = track & ((pos > self.cusum_h) | (neg > self.cusum_h))
+        drift_up = pos > neg
+        pos[drift] = 0.0
+        neg[drift] = 0.0
+        self.cusum_pos[rows, cols] = pos
+        self.cusum_neg[rows, cols] = neg
+
+        # Baseline learning (spikes never enter the baseline)
+        learn = fresh & ~spike
+        delta = x - mu
+        warm = learn & ~ready
+        n_new = n + learn
+        mu_warm = mu + np.where(warm, delta / np.maximum(n_new, 1), 0.0)
+        # Welford during warm-up, EWMA afterwards
+        var_warm = np.where(warm, var + (delta * (x - mu_warm) - var) / np.maximum(n_new, 1), var)
+        ewma = learn & ready
+        mu_new = np.where(ewma, mu + self.alpha * delta, mu_warm)
+        var_new = np.where(ewma, (1 - self.alpha) * (var + self.alpha * delta ** 2), var_warm)
+        self.count[rows, cols] = n_new
+        self.mean[rows, cols] = mu_new
+        self.var[rows, cols] = var_new
+
+        events = []
+        if spike.any() or drift.any():
+            now = datetime.now().isoformat()
+            for i in np.flatnonzero(spike | drift):
+                kind = "ENERGY_SPIKE" if spike[i] else "ENERGY_DRIFT"
+                up = z[i] > 0 if spike[i] else drift_up[i]
+                events.append({
+                    "type": kind,
+                    "machine_id": machine_ids[i],
+                    "state": statuses[i],
+                    "consumption": round(float(x[i]), 3),
+                    "baseline_kw": round(float(mu[i]), 3),
+                    "z": round(float(z[i]), 2),
+                    "direction": "up" if up else "down",
+                    "timestamp": now,
+                })
+            self.stats["spikes"] += int(spike.sum())
+            self.stats["drifts"] += int(drift.sum())
+        self.stats["last_update_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        return events
+
+    def get_baselines(self):
+        """Learned baseline (mean, sigma, samples) per machine and state."""
+        sigma = np.sqrt(self.var)
+        return {mid: {state: {"mean_kw": round(float(self.mean[r, c]), 3),
+                              "sigma_kw": round(float(sigma[r, c]), 3),
+                              "samples": int(self.count[r, c])}
+                      for c, state in enumerate(STATES) if self.count[r, c] > 0}
+                for mid, r in self.index.items()}
@@ -3,6 +3,9 @@ import random
 import threading
 import sqlite3
 from datetime import datetime
+from core.power_scheduler import PowerCapScheduler
+from core.energy_monitor import EnergyAnomalyMonitor
+from core.kpi_engine import KPIEngine, sustainability_score
 
 class Machine:
     def __init__(self, machine_id, name, energy_consumption_idle=0.5):
@@ -11,6 +14,8 @@ class Machine:
         self.status = "IDLE" # IDLE, WORKING, BLOCKED, MAINTENANCE
         self.energy_consumption_idle = energy_consumption_idle
         self.energy_consumption_working = 5.0
+        self.power_jitter = 0.5 # max deviation from nominal working draw
+        self.cycle_time_s = (2.0, 5.0) # processing time range of one piece
         self.current_consumption = energy_consumption_idle
         self.production_count = 0
         self.total_energy_kwh = 0.0
@@ -20,15 +25,19 @@ class Machine:
         """Simulate work cycle."""
         if self.status == "IDLE":
             self.status = "WORKING"
-            self.current_consumption = self.energy_consumption_working + random.uniform(-0.5, 0.5)
+            self.current_consumption = self.energy_consumption_working + random.uniform(-self.power_jitter, self.power_jitter)
             # Simulate processing time
-            processing_time = random.uniform(2, 5)
+            processing_time = random.uniform(*self.cycle_time_s)
             time.sleep(processing_time)
             
             self.production_count += 1
             self.status = "IDLE"
             self.current_consumption = self.energy_consumption_idle
             
+    def nominal_kwh_per_unit(self):
+        """Energy of an average working cycle: the best case, no idle time in between."""
+        return self.energy_consumption_working * sum(self.cycle_time_s) / 2 / 3600
+
     def update_energy(self):
         now = time.time()
         duration_hrs = (now - self.last_update) / 3600
@@ -44,7 +53,14 @@ class FactoryTwin:
             "M3": Machine("M3", "Smart-Packer", energy_consumption_idle=0.4)
         }
         self.factory_speed = 1.0 # Multiplier for production frequency
-        self.energy_limit = 12.0 # Threshold for n8n intervention
+        self.energy_limit = 12.0 # Instantaneous power cap (kW), enforced by the scheduler
+        self.tick_interval = 1.0 # Seconds between simulation ticks
+        self.scheduler = PowerCapScheduler()
+        self.energy_monitor = EnergyAnomalyMonitor(list(self.machines))
+        # Score reference: nominal kWh per piece, averaged over the line
+        self.kpi = KPIEngine(list(self.machines), sum(
+            m.nominal_kwh_per_unit() for m in self.machines.values()) / len(self.machines))
+        self.kpi_window = "15m" # Window behind the headline sustainability_score
         self._init_db()
         
     def _init_db(self):
@@ -66,15 +82,29 @@ class FactoryTwin:
 
     def run_simulation_loop(self, callback):
         """Main engine loop to be run in a thread."""
+        last_tick_ms = 0.0
         while True:
+            tick_start = time.perf_counter()
             total_current_power = 0
+            # Production demand: idle machines ask to start based on speed
+            self.scheduler.request([mid for mid, m in self.machines.items()
+                                    if m.status == "IDLE" and random.random() < (0.2 * self.factory_speed)])
+            # Power-cap aware admission of the queued starts
+            for mid in self.scheduler.decide(self.machines, self.energy_limit, datetime.now().hour):
+                threading.Thread(target=self.machines[mid].work).start()
+
+            ids, statuses, power, energy, production = [], [], [], [], []
             for mid, m in self.machines.items():
-                # Randomly start production based on speed
-                if m.status == "IDLE" and random.random() < (0.2 * self.factory_speed):
-                    threading.Thread(target=m.work).start()
-                
                 m.update_energy()
                 total_current_power += m.current_consumption
+                ids.append(mid)
+                statuses.append(m.status)
+                power.append(m.current_consumption)
+                energy.append(m.total_energy_kwh)
+                production.append(m.production_count)
+            self.kpi.update(ids, statuses, energy, production)
+            # Per-machine power vs learned state baselines (spikes and slow drifts)
+            anomalies = self.energy_monitor.update(ids, statuses, power)
                 
             # Log to DB occasionally
             if random.random() < 0.1:
@@ -83,14 +113,26 @@ class FactoryTwin:
             
             state = self.get_factory_state()
             state['total_power_kw'] = round(float(total_current_power), 2)
+            state['scheduler'] = self.scheduler.get_report()
+            state['energy_anomalies'] = anomalies
+            state['energy_monitor'] = dict(self.energy_monitor.stats)
+            # Factory KPIs for every window, per-machine ones for the headline window
+            state['kpi'] = {w: self.kpi.report(w, machines=(w == self.kpi_window)) for w in self.kpi.windows}
+            state['tick_ms'] = round(last_tick_ms, 2) # duration of the previous tick, broadcast included
             callback(state)
-            time.sleep(1)
+            last_tick_ms = (time.perf_counter() - tick_start) * 1000
+            time.sleep(max(0.0, self.tick_interval - last_tick_ms / 1000))
 
     def set_factory_speed(self, speed):
         """Allows external systems (n8n/BPA) to control factory throughput."""
         self.factory_speed = max(0.1, min(2.0, speed))
         print(f"DTO ACTION: Factory Speed set to {self.factory_speed}")
 
+    def set_energy_limit(self, limit_kw):
+        """Allows external systems (n8n/BPA) to move the power cap."""
+        self.energy_limit = max(1.0, float(limit_kw))
+        print(f"DTO ACTION: Energy Limit set to {self.energy_limit} kW")
+
     def _log_state(self, m):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -101,15 +143,17 @@ class FactoryTwin:
         conn.commit()
         conn.close()
 
-    def get_factory_state(self):
-        total_energy = sum(m.total_energy_kwh for m in self.machines.values())
-        total_prod = sum(m.production_count for m in self.machines.values())
+    def get_factory_state(self, window=None):
+        total_energy, total_prod = self.kpi.totals("lifetime")
+        window = window or self.kpi_window
         return {
             "timestamp": datetime.now().strftime("%H:%M:%S"),
             "total_energy_kwh": round(float(total_energy), 4),
             "total_production": total_prod,
-            "sustainability_score": self.calculate_sustainability(total_energy, total_prod),
+            "sustainability_score": self.calculate_sustainability(*self.kpi.totals(window)),
+            "kpi_window": window,
             "factory_speed": self.factory_speed,
+            "energy_limit": self.energy_limit,
             "machines": {mid: {
                 "name": m.name,
                 "status": m.status,
@@ -119,6 +163,4 @@ class FactoryTwin:
         }
 
     def calculate_sustainability(self, energy, prod):
-        if prod == 0: return 0
-        efficiency = prod / (energy + 0.1)
-        return round(min(100, efficiency * 10), 2)
+        return sustainability_score(energy, prod, self.kpi.reference_kwh_per_unit)
@@ -0,0 +1,216 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+METRICS = ("energy_kwh", "production", "working_s", "idle_s", "blocked_s", "maintenance_s")
+STATE_COLUMN = {"WORKING": 2, "IDLE": 3, "BLOCKED": 4, "MAINTENANCE": 5}
+ENERGY, PRODUCTION, WORKING_S, IDLE_S, BLOCKED_S, MAINTENANCE_S = range(len(METRICS))
+
+def sustainability_score(energy, prod, reference_kwh_per_unit):
+    """
+    0-100: reference kWh per piece over the kWh per piece actually spent.
+    The reference is the machines' nominal working-cycle energy
+    (Machine.nominal_kwh_per_unit), so 100 = every kWh went into working
+    cycles; idle, blocked and queued time pull it down. A pure ratio, so a
+    1-minute and a shift score compare.
+    """
+    if prod == 0: return 0
+    if energy <= 0: return 100
+    return round(min(100, 100 * reference_kwh_per_unit / (energy / prod)), 2)
+
+
+class SlidingWindow:
+    """
+    Sum over the last `span_s` seconds. Deltas go into a ring of `buckets` time
+    slots with a running total: adding is O(1) and an expiring slot is
+    subtracted once, so queries never re-scan the history.
+    """
+    kind = "sliding"
+
+    def __init__(self, span_s, buckets, rows):
+        self.span_s = span_s
+        self.bucket_s = span_s / buckets
+        self.ring = np.zeros((buckets, rows, len(METRICS)))
+        self.total = np.zeros((rows, len(METRICS)))
+        self.head = None  # absolute index of the newest slot
+
+    def advance(self, now):
+        b = int(now // self.bucket_s)
+        if self.head is None:
+            self.head = b
+        for i in range(self.head + 1, min(b, self.head + len(self.ring)) + 1):
+            slot = i % len(self.ring)
+            self.total -= self.ring[slot]
+            self.ring[slot] = 0.0
+        self.head = max(self.head, b)
+
+    def add(self, delta, now):
+        self.advance(now)
+        self.ring[self.head % len(self.ring)] += delta
+        self.total += delta
+
+    def values(self):
+        return np.maximum(self.total, 0.0)  # clamp float residue left by subtraction
+
+    def info(self):
+        return {"span_s": self.span_s}
+
+
+class TumblingWindow:
+    """Aggregate of the current period (shift, day); the last closed one is kept as `previous`."""
+    kind = "tumbling"
+
+    def __init__(self, period_key, rows):
+        self.period_key = period_key
+        self.current = np.zeros((rows, len(METRICS)))
+        self.key = None
+        self.previous = None  # (key, totals)
+
+    def advance(self, now):
+        key = self.period_key(datetime.fromtimestamp(now))
+        if key != self.key:
+            if self.key is not None:
+                self.previous = (self.key, self.current.copy())
+            self.current[:] = 0.0
+            self.key = key
+
+    def add(self, delta, now):
+        self.advance(now)
+        self.current += delta
+
+    def values(self):
+        return self.current
+
+    def info(self):
+        return {"started": self.key}
+
+
+class LifetimeWindow:
+    kind = "lifetime"
+
+    def __init__(self, rows):
+        self.total = np.zeros((rows, len(METRICS)))
+
+    def advance(self, now):
+        pass
+
+    def add(self, delta, now):
+        self.total += delta
+
+    def values(self):
+        return self.total
+
+    def info(self):
+        return {}
+
+
+def shift_key(shift_starts):
+    """Period key = ISO start of the shift containing the timestamp (shifts may cross midnight)."""
+    starts = sorted(shift_starts)
+
+    def key(dt):
+        day = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        candidates = [day + timedelta(hours=h) for h in starts] + [day - timedelta(days=1) + timedelta(hours=starts[-1])]
+        return max(c for c in candidates if c <= dt).isoformat()
+    return key
+
+
+def day_key(dt):
+    return dt.date().isoformat()
+
+
+class KPIEngine:
+    """
+    Incremental KPIs per machine and for the whole factory.
+    Each tick the engine turns the machines' counters into a delta matrix
+    (energy, production and seconds spent per state; one row per machine plus
+    a factory row) and adds it to every window: sliding 1 min / 15 min,
+    tumbling shift / day, and lifetime. Cost per tick does not depend on how
+    long the twin has been running; KPIs are derived from the window sums on query.
+    OEE = availability x performance x quality, with quality = 1 (the twin
+    does not simulate scrap).
+    """
+    def __init__(self, machine_ids, reference_kwh_per_unit, shift_starts=(6, 14, 22), ideal_cycle_s=2.0):
+        self.machine_ids = list(machine_ids)
+        self.index = {mid: i for i, mid in enumerate(self.machine_ids)}
+        self.ideal_cycle_s = ideal_cycle_s
+        self.reference_kwh_per_unit = reference_kwh_per_unit
+        rows = len(self.machine_ids) + 1  # last row = factory
+        self.windows = {
+            "1m": SlidingWindow(60, 60, rows),
+            "15m": SlidingWindow(900, 90, rows),
+            "shift": TumblingWindow(shift_key(shift_starts), rows),
+            "day": TumblingWindow(day_key, rows),
+            "lifetime": LifetimeWindow(rows),
+        }
+        self.last_energy = None
+        self.last_production = None
+        self.last_time = None
+        self._lock = threading.Lock()
+
+    def update(self, machine_ids, statuses, energy_totals, production_totals, now=None):
+        """One tick: lifetime counters (kWh, pieces) and current status of each machine."""
+        now = time.time() if now is None else now
+        rows = np.fromiter((self.index[mid] for mid in machine_ids), dtype=np.intp, count=len(machine_ids))
+        cols = np.fromiter((STATE_COLUMN[s] for s in statuses), dtype=np.intp, count=len(statuses))
+        energy = np.zeros(len(self.machine_ids))
+        production = np.zeros(len(self.machine_ids))
+        energy[rows] = energy_totals
+        production[rows] = production_totals
+        if self.last_time is None:
+            # Counters start at zero, so lifetime sums match the machines' own totals
+            self.last_energy, self.last_production, self.last_time = np.zeros_like(energy), np.zeros_like(production), now
+
+        delta = np.zeros((len(self.machine_ids) + 1, len(METRICS)))
+        delta[:-1, ENERGY] = energy - self.last_energy
+        delta[:-1, PRODUCTION] = production - self.last_production
+        delta[rows, cols] = max(0.0, now - self.last_time)  # seconds in the status seen at this tick
+        delta[-1] = delta[:-1].sum(axis=0)
+        self.last_energy, self.last_production, self.last_time = energy, production, now
+
+        with self._lock:
+            for window in self.windows.values():
+                window.add(delta, now)
+
+    def totals(self, window="lifetime", now=None):
+        """Raw window sums for the factory: (energy_kwh, production)."""
+        with self._lock:
+            w = self.windows[window]
+            w.advance(time.time() if now is None else now)  # same expiry as report()
+            values = w.values()
+            return float(values[-1, ENERGY]), int(round(values[-1, PRODUCTION]))
+
+    def kpis(self, row):
+        observed = row[WORKING_S:].sum()
+        run = observed - row[BLOCKED_S] - row[MAINTENANCE_S]
+        availability = run / observed if observed else 0.0
+        performance = min(1.0, row[PRODUCTION] * self.ideal_cycle_s / run) if run else 0.0
+        quality = 1.0
+        return {
+            "energy_kwh": round(float(row[ENERGY]), 4),
+            "production": int(round(row[PRODUCTION])),
+            "observed_s": round(float(observed), 1),
+            "utilization": round(float(row[WORKING_S] / observed), 4) if observed else 0.0,
+            "availability": round(float(availability), 4),
+            "performance": round(float(performance), 4),
+            "quality": quality,
+            "oee": round(float(availability * performance * quality), 4),
+            "energy_per_unit_kwh": round(float(row[ENERGY] / row[PRODUCTION]), 4) if row[PRODUCTION] else None,
+            "sustainability_score": sustainability_score(float(row[ENERGY]), int(round(row[PRODUCTION])),
+                                                         self.reference_kwh_per_unit),
+        }
+
+    def report(self, window, machines=True, now=None):
+        with self._lock:
+            w = self.windows[window]
+            w.advance(time.time() if now is None else now)  # expire slots even if no tick arrived since
+            values = w.values().copy()
+            previous = getattr(w, "previous", None)
+            out = {"window": window, "kind": w.kind, **w.info(), "factory": self.kpis(values[-1])}
+            if previous is not None:
+                out["previous"] = {"started": previous[0], "factory": self.kpis(previous[1][-1])}
+        if machines:
+            out["machines"] = {mid: self.kpis(values[i]) for mid, i in self.index.items()}
+        return out
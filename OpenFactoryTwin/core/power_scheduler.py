@@ -0,0 +1,100 @@
+import time
+import numpy as np
+
+
+class PowerCapScheduler:
+    """
+    Decides, every tick, which machines may start a work cycle without the
+    factory exceeding its instantaneous power cap (FactoryTwin.energy_limit).
+
+    Machines that want to work are queued as start requests; each decision is
+    a greedy knapsack over the queue: candidates are ranked by how long they
+    have waited (anti-starvation) and by how little extra power they need, then
+    admitted while the projected peak stays under the cap. An optional
+    time-of-use price curve sheds load in expensive hours by scaling the cap.
+    """
+    def __init__(self, price_curve=None, max_price=None, min_cap_fraction=0.5, aging_weight=1.0):
+        self.price_curve = price_curve      # 24 hourly prices (EUR/kWh) or None
+        self.max_price = max_price          # above this price the cap shrinks proportionally
+        self.min_cap_fraction = min_cap_fraction
+        self.aging_weight = aging_weight
+        self.pending = {}                   # machine_id -> tick of the start request
+        self.tick = 0
+        self.stats = {
+            "requested": 0,
+            "started": 0,
+            "machine_ticks": 0,     # sum over ticks of the machines simulated
+            "deferred_ticks": 0,    # sum over ticks of requests left waiting
+            "peak_power_kw": 0.0,
+            "cap_violations": 0,
+            "last_decision_ms": 0.0,
+        }
+
+    def effective_cap(self, cap_kw, hour):
+        """Instantaneous cap after time-of-use load shedding."""
+        if not self.price_curve or not self.max_price:
+            return cap_kw
+        price = self.price_curve[hour % len(self.price_curve)]
+        if price <= self.max_price:
+            return cap_kw
+        return cap_kw * max(self.min_cap_fraction, self.max_price / price)
+
+    def request(self, machine_ids):
+        """Queues start requests (machines already waiting keep their position)."""
+        for mid in machine_ids:
+            if mid not in self.pending:
+                self.pending[mid] = self.tick
+                self.stats["requested"] += 1
+
+    def decide(self, machines, cap_kw, hour=0):
+        """Returns the ids of the machines to start this tick."""
+        t0 = time.perf_counter()
+        self.tick += 1
+        self.stats["machine_ticks"] += len(machines)
+        # Requests of machines that are no longer idle are dropped
+        self.pending = {mid: t for mid, t in self.pending.items() if machines[mid].status == "IDLE"}
+
+        current_kw = sum(m.current_consumption for m in machines.values())
+        self.stats["peak_power_kw"] = max(self.stats["peak_power_kw"], round(float(current_kw), 2))
+        if current_kw > cap_kw:
+            self.stats["cap_violations"] += 1
+        if not self.pending:
+            self.stats["last_decision_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            return []
+
+        ids = list(self.pending)
+        cand = [machines[mid] for mid in ids]
+        # Worst-case extra draw when the machine switches from IDLE to WORKING
+        delta = np.array([m.energy_consumption_working + m.power_jitter - m.energy_consumption_idle for m in cand])
+        waited = self.tick - np.array([self.pending[mid] for mid in ids])
+        priority = self.aging_weight * waited + 1.0 / np.maximum(delta, 1e-6)
+
+        headroom = self.effective_cap(cap_kw, hour) - current_kw
+        start = []
+        for i in np.argsort(-priority, kind="stable"):
+            if delta[i] <= headroom:
+                headroom -= delta[i]
+                start.append(ids[i])
+        for mid in start:
+            del self.pending[mid]
+        self.stats["started"] += len(start)
+        self.stats["deferred_ticks"] += len(self.pending)
+        self.stats["last_decision_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        return start
+
+    def get_report(self):
+        """
+        Throughput achieved vs. the uncapped baseline. Uncapped, no request
+        ever waits: the same start rate per non-queued machine-tick would be
+        sustained over every machine-tick.
+        """
+        started = self.stats["started"]
+        active = self.stats["machine_ticks"] - self.stats["deferred_ticks"]
+        baseline = started * self.stats["machine_ticks"] / active if active > 0 else started
+        return {
+            **self.stats,
+            "pending": len(self.pending),
+            "uncapped_baseline_starts": round(baseline, 1),
+            "throughput_vs_uncapped": round(started / baseline, 3) if baseline else 1.0,
+            "avg_wait_ticks": round(self.stats["deferred_ticks"] / self.stats["started"], 2) if self.stats["started"] else 0.0,
+        }
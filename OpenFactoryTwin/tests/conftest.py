@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Same import root as the app (`PYTHONPATH=.` from OpenFactoryTwin/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,40 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # The app builds its FactoryTwin (and SQLite file) in the working directory at import
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("factory"))
+        main = importlib.import_module("app.main")
+    return main.app.test_client(), main.twin
+
+
+@pytest.mark.parametrize("body", [
+    {"price_curve": "abc", "max_price": 0.1},
+    {"price_curve": [0.1] * 23},
+    {"price_curve": [0.1] * 23 + ["x"]},
+    {"max_price": -1},
+    {"max_price": "0.2"},
+    {"energy_limit": "lots"},
+    {"energy_limit": True},
+    [1, 2],
+])
+def test_scheduler_rejects_invalid_payloads_without_touching_the_twin(client, body):
+    app, twin = client
+    before = (twin.energy_limit, twin.scheduler.price_curve, twin.scheduler.max_price)
+    response = app.post("/api/scheduler", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert (twin.energy_limit, twin.scheduler.price_curve, twin.scheduler.max_price) == before
+
+
+def test_scheduler_accepts_valid_payload(client):
+    app, twin = client
+    response = app.post("/api/scheduler", json={"energy_limit": 10, "price_curve": [0.1] * 24, "max_price": 0.3})
+    assert response.status_code == 200
+    assert twin.energy_limit == 10.0
+    assert twin.scheduler.effective_cap(10.0, 5) == 10.0
+    assert app.post("/api/scheduler", json={"max_price": None}).status_code == 200
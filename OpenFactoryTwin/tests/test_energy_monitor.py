@@ -0,0 +1,71 @@
+import random
+
+from core.energy_monitor import EnergyAnomalyMonitor
+
+IDS = ["M1", "M2", "M3"]
+
+
+def _stream(ticks, seed=0, idle_drift=None, spike_at=None):
+    """
+    Simulator-like meters: a WORKING draw of 5 kW +/- 0.5 held for a 2-5 tick
+    cycle, a noisy 0.5 kW IDLE draw. `idle_drift=(machine, start, kw_per_tick)`
+    makes that machine's IDLE draw creep up; `spike_at=(machine, tick)` sets a
+    15 kW reading on the first tick of a cycle at or after `tick`.
+    """
+    rng = random.Random(seed)
+    left = {mid: 0 for mid in IDS}
+    draw = {mid: 0.5 for mid in IDS}
+    for t in range(ticks):
+        statuses, power = [], []
+        for mid in IDS:
+            if left[mid] == 0 and rng.random() < 0.3:
+                left[mid] = rng.randint(2, 5)
+                draw[mid] = 5.0 + rng.uniform(-0.5, 0.5)
+                if spike_at and mid == spike_at[0] and t >= spike_at[1]:
+                    draw[mid], spike_at = 15.0, None
+            if left[mid] > 0:
+                left[mid] -= 1
+                statuses.append("WORKING")
+                power.append(draw[mid])
+            else:
+                idle = 0.5 + rng.gauss(0, 0.02)
+                if idle_drift and mid == idle_drift[0] and t >= idle_drift[1]:
+                    idle += idle_drift[2] * (t - idle_drift[1])
+                statuses.append("IDLE")
+                power.append(idle)
+        yield t, statuses, power
+
+
+def _run(monitor, stream):
+    return [(t, e) for t, statuses, power in stream for e in monitor.update(IDS, statuses, power)]
+
+
+def test_clean_data_raises_no_alarms():
+    monitor = EnergyAnomalyMonitor(IDS)
+    assert _run(monitor, _stream(5000)) == []
+    baseline = monitor.get_baselines()["M1"]
+    assert abs(baseline["WORKING"]["mean_kw"] - 5.0) < 0.2
+    assert abs(baseline["IDLE"]["mean_kw"] - 0.5) < 0.05
+
+
+def test_injected_spike_is_reported_once():
+    monitor = EnergyAnomalyMonitor(IDS)
+    events = _run(monitor, _stream(3000, spike_at=("M2", 1500)))
+    assert len(events) == 1  # held for the whole cycle, reported on the fresh reading only
+    _, event = events[0]
+    assert (event["type"], event["machine_id"], event["state"], event["direction"]) == \
+        ("ENERGY_SPIKE", "M2", "WORKING", "up")
+    assert monitor.stats["spikes"] == 1
+    assert monitor.get_baselines()["M2"]["WORKING"]["mean_kw"] < 6.0  # the spike never enters the baseline
+
+
+def test_idle_drift_is_detected_on_the_drifting_machine():
+    monitor = EnergyAnomalyMonitor(IDS)
+    events = _run(monitor, _stream(3000, idle_drift=("M3", 1000, 0.0005)))
+    assert events
+    first_tick, first = events[0]
+    assert (first["type"], first["machine_id"], first["state"], first["direction"]) == \
+        ("ENERGY_DRIFT", "M3", "IDLE", "up")
+    # Caught well before the creep reaches a spike-sized offset (+0.5 kW at tick 2000)
+    assert first_tick < 1500
+    assert {e["machine_id"] for _, e in events} == {"M3"}
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import numpy as np
+
+from core.factory_engine import FactoryTwin, Machine
+from core.kpi_engine import (ENERGY, METRICS, PRODUCTION, KPIEngine, SlidingWindow, TumblingWindow, day_key,
+                             shift_key, sustainability_score)
+
+T0 = datetime(2026, 9, 1, 21, 0).timestamp()
+REF = Machine("M1", "Laser-Cutter").nominal_kwh_per_unit()
+
+
+def _delta(energy=0.0, production=0.0):
+    delta = np.zeros((1, len(METRICS)))
+    delta[0, ENERGY], delta[0, PRODUCTION] = energy, production
+    return delta
+
+
+def test_sliding_window_expires_old_slots():
+    window = SlidingWindow(60, 60, rows=1)
+    window.add(_delta(1.0, 1), T0)
+    window.add(_delta(2.0, 1), T0 + 30)
+    window.advance(T0 + 59)
+    assert window.values()[0, ENERGY] == 3.0
+    window.advance(T0 + 60)  # the first slot leaves the window
+    assert window.values()[0, ENERGY] == 2.0
+    window.advance(T0 + 3600)  # long gap: everything expires at once
+    assert window.values()[0, PRODUCTION] == 0.0
+
+
+def test_tumbling_window_keeps_the_closed_period_as_previous():
+    window = TumblingWindow(day_key, rows=1)
+    window.add(_delta(1.0, 2), T0)
+    window.add(_delta(0.5, 1), T0 + 4 * 3600)  # past midnight
+    assert window.key == "2026-09-02"
+    assert window.values()[0, PRODUCTION] == 1
+    key, totals = window.previous
+    assert (key, totals[0, PRODUCTION]) == ("2026-09-01", 2)
+
+
+def test_night_shift_spans_midnight():
+    key = shift_key((6, 14, 22))
+    assert key(datetime(2026, 9, 1, 23, 0)) == "2026-09-01T22:00:00"
+    assert key(datetime(2026, 9, 2, 0, 0)) == "2026-09-01T22:00:00"
+    assert key(datetime(2026, 9, 2, 5, 59)) == "2026-09-01T22:00:00"
+    assert key(datetime(2026, 9, 2, 6, 0)) == "2026-09-02T06:00:00"
+    assert key(datetime(2026, 9, 2, 14, 0)) == "2026-09-02T14:00:00"
+
+
+def test_engine_shift_window_rolls_over_at_shift_change():
+    engine = KPIEngine(["M1"], REF)
+    for minute in range(0, 121, 10):  # 21:00 - 23:00, one piece every 10 minutes
+        engine.update(["M1"], ["WORKING"], [0.05 * minute / 10], [minute // 10], now=T0 + 60 * minute)
+    report = engine.report("shift", machines=False, now=T0 + 7200)
+    # Deltas are booked at the tick that sees them: the 22:00 tick opens the night shift
+    assert report["started"] == "2026-09-01T22:00:00"
+    assert report["factory"]["production"] == 7
+    assert report["previous"]["started"] == "2026-09-01T14:00:00"
+    assert report["previous"]["factory"]["production"] == 5
+
+
+def test_totals_expire_like_report():
+    engine = KPIEngine(["M1"], REF)
+    engine.update(["M1"], ["WORKING"], [0.01], [2], now=T0)
+    assert engine.totals("1m", now=T0 + 30) == (0.01, 2)
+    assert engine.totals("1m", now=T0 + 120) == (0.0, 0)
+    assert engine.totals("lifetime", now=T0 + 120) == (0.01, 2)
+
+
+def test_sustainability_score_is_a_ratio_to_the_reference():
+    assert sustainability_score(0.0, 0, REF) == 0
+    assert sustainability_score(10 * REF, 10, REF) == 100
+    assert sustainability_score(20 * REF, 10, REF) == 50
+    # Same kWh per piece in a 1-minute and a shift-sized window: same score
+    assert sustainability_score(0.02, 2, REF) == sustainability_score(48.0, 4800, REF)
+    # The previous formula saturated at 100 for the twin's ~0.008 kWh per piece
+    assert sustainability_score(0.8, 100, REF) < 100
+
+
+def test_twin_reference_comes_from_its_machines(tmp_path):
+    twin = FactoryTwin(db_path=str(tmp_path / "factory_twin.db"))
+    expected = sum(m.nominal_kwh_per_unit() for m in twin.machines.values()) / len(twin.machines)
+    assert twin.kpi.reference_kwh_per_unit == expected
+    assert twin.calculate_sustainability(10 * expected, 10) == 100
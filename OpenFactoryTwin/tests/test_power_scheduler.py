@@ -0,0 +1,69 @@
+import random
+
+from core.factory_engine import Machine
+from core.power_scheduler import PowerCapScheduler
+
+
+def _machine(mid, working, idle=0.5, jitter=0.5):
+    m = Machine(mid, mid, energy_consumption_idle=idle)
+    m.energy_consumption_working = working
+    m.power_jitter = jitter
+    return m
+
+
+def _start(m):
+    m.status = "WORKING"
+    m.current_consumption = m.energy_consumption_working + random.uniform(-m.power_jitter, m.power_jitter)
+
+
+def test_decide_never_exceeds_the_cap():
+    random.seed(1)
+    machines = {f"M{i}": _machine(f"M{i}", random.uniform(3, 8)) for i in range(50)}
+    scheduler = PowerCapScheduler()
+    remaining = {mid: 0 for mid in machines}
+    cap = 60.0
+    for _ in range(2000):
+        scheduler.request([mid for mid, m in machines.items() if m.status == "IDLE" and random.random() < 0.3])
+        for mid in scheduler.decide(machines, cap):
+            _start(machines[mid])
+            remaining[mid] = random.randint(2, 5)
+        assert sum(m.current_consumption for m in machines.values()) <= cap
+        for mid, m in machines.items():
+            if m.status == "WORKING":
+                remaining[mid] -= 1
+                if remaining[mid] == 0:
+                    m.status, m.current_consumption = "IDLE", m.energy_consumption_idle
+    report = scheduler.get_report()
+    assert report["cap_violations"] == 0
+    assert report["started"] > 1000
+
+
+def _fleet():
+    # Either the big machine or both small ones fit in the headroom, never all three
+    return {"B": _machine("B", 9.0), "S1": _machine("S1", 4.5), "S2": _machine("S2", 4.5)}
+
+
+def test_fresh_requests_prefer_the_smallest_power_step():
+    machines = _fleet()
+    scheduler = PowerCapScheduler()
+    scheduler.request(["B", "S1", "S2"])
+    assert sorted(scheduler.decide(machines, cap_kw=11.0)) == ["S1", "S2"]
+    assert list(scheduler.pending) == ["B"]
+
+
+def test_aging_lets_a_long_waiting_machine_go_first():
+    machines = _fleet()
+    scheduler = PowerCapScheduler()
+    scheduler.request(["B"])
+    for _ in range(3):
+        assert scheduler.decide(machines, cap_kw=1.5) == []  # no headroom: B keeps waiting
+    scheduler.request(["S1", "S2"])
+    assert scheduler.decide(machines, cap_kw=11.0) == ["B"]
+
+
+def test_expensive_hours_shrink_the_cap():
+    curve = [0.1] * 24
+    curve[18] = 0.4
+    scheduler = PowerCapScheduler(price_curve=curve, max_price=0.2)
+    assert scheduler.effective_cap(12.0, 10) == 12.0
+    assert scheduler.effective_cap(12.0, 18) == 6.0
@@ -0,0 +1,6 @@
+from .columnar import TelemetryExporter, open_telemetry, load_telemetry, EXPORT_SOURCES
+from .sketches import QuantileSketch
+from .process_mining import ProcessMiner, BPALogSource, FactoryLogSource, MiningSession
+
+__all__ = ["TelemetryExporter", "open_telemetry", "load_telemetry", "EXPORT_SOURCES",
+           "QuantileSketch", "ProcessMiner", "BPALogSource", "FactoryLogSource", "MiningSession"]
@@ -0,0 +1,31 @@
+"""
+Continuous telemetry export.
+
+    python -m analytics --db ../OpenFactoryTwin/factory_twin.db --table factory_logs --out ../telemetry_lake/factory_logs --follow 30
+"""
+import argparse
+
+from .columnar import TelemetryExporter, EXPORT_SOURCES, FORMATS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export twin telemetry from SQLite to Parquet/Arrow")
+    parser.add_argument("--db", required=True, help="SQLite database of the twin")
+    parser.add_argument("--table", required=True, help=f"source table ({', '.join(EXPORT_SOURCES)})")
+    parser.add_argument("--out", required=True, help="output directory (date-partitioned)")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--follow", type=float, default=0, help="keep exporting every N seconds")
+    args = parser.parse_args()
+
+    exporter = TelemetryExporter(args.db, args.table, args.out, fmt=args.format)
+    if args.follow > 0:
+        try:
+            exporter.run_forever(args.follow)
+        except KeyboardInterrupt:
+            exporter.stop()
+    else:
+        print(f"📦 Exported {exporter.export_once()} rows from {args.table} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+# Telemetry tables written by the twins and the columns worth dictionary-encoding
+EXPORT_SOURCES = {
+    "readings": {"dictionary_columns": ()},                           # DTO Sensore Temperatura
+    "factory_logs": {"dictionary_columns": ("machine_id", "status")},  # OpenFactoryTwin
+    "plant_states": {"dictionary_columns": ("status",)},               # GreenAI PlantTwin
+}
+
+FORMATS = {"parquet": "parquet", "arrow": "ipc"}
+WATERMARK_FILE = "_watermark.json"
+
+
+def arrow_type(declared):
+    """Arrow type for a SQLite declared column type (SQLite's affinity rules)."""
+    declared = (declared or "").upper()
+    if "INT" in declared:
+        return pa.int64()
+    if any(t in declared for t in ("CHAR", "CLOB", "TEXT")):
+        return pa.string()
+    if not declared or "BLOB" in declared:
+        return None  # no affinity: left to inference
+    return pa.float64()  # REAL / FLOAT / DOUBLE / NUMERIC
+
+
+class TelemetryExporter:
+    """
+    Continuous SQLite -> columnar export.
+    Rows are pulled incrementally after the last exported `id` (watermark) and
+    written as date-partitioned Parquet or Arrow IPC files (hive layout:
+    `out_dir/date=YYYY-MM-DD/part-*.parquet`). Low-cardinality columns are
+    dictionary-encoded so `machine_id`/`status` cost a few bits per row.
+    Follow mode writes one small file per poll, so partitions are compacted:
+    a day is rewritten into a single file once newer rows exist (the partition
+    is closed), and the open day whenever it holds more than `max_open_files`.
+    """
+    def __init__(self, db_path, table, out_dir, fmt="parquet", batch_rows=100_000,
+                 dictionary_columns=None, timestamp_column="timestamp", max_open_files=32):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt} (use {', '.join(FORMATS)})")
+        self.db_path = db_path
+        self.table = table
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.batch_rows = batch_rows
+        if dictionary_columns is None:
+            dictionary_columns = EXPORT_SOURCES.get(table, {}).get("dictionary_columns", ())
+        self.dictionary_columns = tuple(dictionary_columns)
+        self.timestamp_column = timestamp_column
+        self.max_open_files = max_open_files
+        self._stop = threading.Event()
+        os.makedirs(out_dir, exist_ok=True)
+        self.last_id, self.last_date = self._load_watermark()
+        self._pending = set(self._partitions())  # partitions that may still need compaction
+
+    # --- Watermark ----------------------------------------------------------
+    def _watermark_path(self):
+        return os.path.join(self.out_dir, WATERMARK_FILE)
+
+    def _load_watermark(self):
+        try:
+            with open(self._watermark_path()) as f:
+                watermark = json.load(f)
+            return int(watermark["last_id"]), watermark.get("last_date")
+        except (FileNotFoundError, KeyError, ValueError):
+            return 0, None
+
+    def _save_watermark(self):
+        tmp = self._watermark_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"table": self.table, "last_id": self.last_id, "last_date": self.last_date,
+                       "updated": datetime.now().isoformat()}, f)
+        os.replace(tmp, self._watermark_path())
+
+    # --- Export -------------------------------------------------------------
+    def _column_types(self, conn):
+        """
+        Declared types, so every batch gets the same schema: inferred per
+        batch, a poll where a column is all NULL would write it as `null`
+        and the partition could no longer be compacted or read.
+        """
+        return {row[1]: arrow_type(row[2]) for row in conn.execute(f"PRAGMA table_info({self.table})")}
+
+    def _to_arrow(self, names, rows, types=None):
+        types = types or {}
+        columns = list(zip(*rows))
+        arrays = {}
+        for name, values in zip(names, columns):
+            array = pa.array(values, type=types.get(name))
+            if name == self.timestamp_column:
+                array = pc.cast(array, pa.timestamp("us"))
+            elif name in self.dictionary_columns:
+                array = pc.dictionary_encode(array)
+            arrays[name] = array
+        arrays["date"] = pc.strftime(arrays[self.timestamp_column], format="%Y-%m-%d")
+        return pa.table(arrays)
+
+    def export_once(self):
+        """Exports every row newer than the watermark. Returns the number of rows written."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(f"SELECT * FROM {self.table} WHERE id > ? ORDER BY id", (self.last_id,))
+            names = [d[0] for d in cursor.description]
+            types = self._column_types(conn)
+            id_idx = names.index("id")
+            exported = 0
+            while True:
+                rows = cursor.fetchmany(self.batch_rows)
+                if not rows:
+                    break
+                table = self._to_arrow(names, rows, types)
+                ds.write_dataset(
+                    table, self.out_dir, format=FORMATS[self.fmt],
+                    partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+                    basename_template=f"part-{rows[0][id_idx]:012d}-{{i}}.{self.fmt}",
+                    existing_data_behavior="overwrite_or_ignore",
+                )
+                self.last_id = rows[-1][id_idx]
+                dates = set(table["date"].to_pylist())
+                self.last_date = max([self.last_date or "", *dates])
+                self._pending |= dates
+                self._save_watermark()
+                exported += len(rows)
+        finally:
+            conn.close()
+        if exported:
+            self.compact()
+        return exported
+
+    # --- Compaction ---------------------------------------------------------
+    def _partitions(self):
+        return sorted(name[len("date="):] for name in os.listdir(self.out_dir) if name.startswith("date="))
+
+    def _part_files(self, date):
+        folder = os.path.join(self.out_dir, f"date={date}")
+        return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                      if name.startswith("part-") and name.endswith(f".{self.fmt}"))
+
+    def compact(self):
+        """Rewrites closed (and overgrown open) partitions into one file each. Returns the partitions compacted."""
+        compacted = []
+        for date in sorted(self._pending):
+            closed = self.last_date is not None and date < self.last_date
+            files = self._part_files(date) if os.path.isdir(os.path.join(self.out_dir, f"date={date}")) else []
+            if len(files) > 1 and (closed or len(files) > self.max_open_files):
+                self._compact_partition(date, files)
+                compacted.append(date)
+            if closed:
+                self._pending.discard(date)
+        return compacted
+
+    def _compact_partition(self, date, files):
+        table = ds.dataset(files, format=FORMATS[self.fmt]).to_table()
+        table = table.sort_by("id").unify_dictionaries()
+        # Rows already compacted before a crash may be present twice: keep the first copy
+        ids = table["id"].to_numpy()
+        if len(ids) > 1 and (ids[1:] == ids[:-1]).any():
+            table = table.filter(pa.array(np.concatenate([[True], ids[1:] != ids[:-1]])))
+        folder = os.path.join(self.out_dir, f"date={date}")
+        target = os.path.join(folder, f"part-{ids[0]:012d}-c.{self.fmt}")
+        tmp = os.path.join(folder, f"_compact.{self.fmt}.tmp")  # "_" files are ignored by readers
+        if self.fmt == "parquet":
+            pq.write_table(table, tmp)
+        else:
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, target)
+        for path in files:
+            if path != target:
+                os.remove(path)
+
+    def run_forever(self, interval=30.0):
+        """Continuous mode: exports new rows every `interval` seconds until stop()."""
+        while not self._stop.is_set():
+            try:
+                written = self.export_once()
+                if written:
+                    print(f"📦 Exported {written} rows from {self.table} -> {self.out_dir}")
+            except sqlite3.OperationalError as e:
+                print(f"Export error ({self.table}): {e}")
+            self._stop.wait(interval)
+
+    def start(self, interval=30.0):
+        thread = threading.Thread(target=self.run_forever, args=(interval,), daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+
+def open_telemetry(path, fmt="parquet"):
+    """Opens an exported telemetry lake as a memory-mapped Arrow dataset."""
+    return ds.dataset(
+        path, format=FORMATS[fmt],
+        partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+        exclude_invalid_files=True,
+    )
+
+
+def load_telemetry(path, columns=None, start=None, end=None, machine_id=None, status=None,
+                   fmt="parquet", to_pandas=False):
+    """
+    Reads an exported telemetry lake with predicate pushdown.
+    `start`/`end` prune whole date partitions before any file is opened and
+    are then applied on the timestamp column; `machine_id`/`status` (a value
+    or a list) are pushed down to the row-group statistics. Arrow IPC files are
+    read zero-copy from the memory map.
+    """
+    dataset = open_telemetry(path, fmt)
+    expr = None
+
+    def _and(cond):
+        return cond if expr is None else expr & cond
+
+    if start is not None:
+        start = _as_datetime(start)
+        expr = _and(ds.field("date") >= start.strftime("%Y-%m-%d"))
+        expr = _and(ds.field("timestamp") >= pa.scalar(start, pa.timestamp("us")))
+    if end is not None:
+        end = _as_datetime(end)
+        expr = _and(ds.field("date") <= end.strftime("%Y-%m-%d"))
+        expr = _and(ds.field("timestamp") < pa.scalar(end, pa.timestamp("us")))
+    for name, value in (("machine_id", machine_id), ("status", status)):
+        if value is not None:
+            values = [value] if isinstance(value, str) else list(value)
+            expr = _and(ds.field(name).isin(values))
+
+    table = dataset.to_table(columns=columns, filter=expr)
+    return table.to_pandas() if to_pandas else table
+
+
+def _as_datetime(value):
+    """Accepts datetime objects or ISO strings."""
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
@@ -0,0 +1,306 @@
+"""
+Streaming process mining over the twins' event trails.
+
+    python -m analytics.process_mining --bpa-log "../DTO Sensore Temperatura/bpa_actions.log" --factory-db ../OpenFactoryTwin/factory_twin.db --state ../telemetry_lake/mining_state.pkl
+
+With --state the miners and the source offsets are saved after each run, so
+the next run only reads what was appended since; --follow N keeps the miners
+alive and polls every N seconds.
+"""
+import argparse
+import json
+import os
+import pickle
+import re
+import sqlite3
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+from .sketches import QuantileSketch
+
+START, END = "▶ START", "■ END"
+
+BPA_LOG_PATTERN = re.compile(r"^\[(?P<ts>[^\]]+)\] BPA ACTION: (?P<action>[A-Z_]+)")
+
+
+class ProcessMiner:
+    """
+    Incremental process-mining engine fed with (case, activity, timestamp) events.
+    For every event it updates, in O(1):
+      - the directly-follows graph (edge counts a -> b),
+      - the time spent in each activity (from its event to the next one of the
+        same case) and the waiting time on each edge, as quantile sketches.
+    Memory is bounded: open cases live in an LRU capped at `max_open_cases` and
+    closed after `case_timeout_s` of silence, sketches have a fixed bucket budget.
+    "Where is time spent" queries never re-scan history.
+    """
+    def __init__(self, max_open_cases=100_000, case_timeout_s=None, collapse_repeats=True,
+                 relative_accuracy=0.01):
+        self.max_open_cases = max_open_cases
+        self.case_timeout_s = case_timeout_s
+        self.collapse_repeats = collapse_repeats  # status polls repeat the same activity
+        self.relative_accuracy = relative_accuracy
+        self.open_cases = OrderedDict()            # case -> (activity, entered_at)
+        self.activity_counts = defaultdict(int)
+        self.edge_counts = defaultdict(int)
+        self.sojourn = defaultdict(self._sketch)   # activity -> time spent in it
+        self.edge_wait = defaultdict(self._sketch) # (a, b) -> elapsed time on the edge
+        self.events = 0
+        self.cases_closed = 0
+        self.watermark = None                      # latest event timestamp seen
+
+    def _sketch(self):
+        return QuantileSketch(self.relative_accuracy)
+
+    # --- Ingestion ----------------------------------------------------------
+    def ingest(self, case, activity, timestamp):
+        ts = _to_epoch(timestamp)
+        self.events += 1
+        if self.watermark is None or ts > self.watermark:
+            self.watermark = ts
+            if self.case_timeout_s:
+                self._expire(ts)
+
+        prev = self.open_cases.get(case)
+        if prev is None:
+            self._edge(START, activity, None)
+        else:
+            prev_activity, entered_at = prev
+            if self.collapse_repeats and prev_activity == activity:
+                self.open_cases.move_to_end(case)
+                return
+            elapsed = max(0.0, ts - entered_at)
+            self.sojourn[prev_activity].add(elapsed)
+            self._edge(prev_activity, activity, elapsed)
+
+        self.activity_counts[activity] += 1
+        self.open_cases[case] = (activity, ts)
+        self.open_cases.move_to_end(case)
+        if len(self.open_cases) > self.max_open_cases:
+            self._close(next(iter(self.open_cases)))
+
+    def ingest_many(self, events):
+        for case, activity, timestamp in events:
+            self.ingest(case, activity, timestamp)
+        return self
+
+    def _edge(self, a, b, elapsed):
+        self.edge_counts[(a, b)] += 1
+        if elapsed is not None:
+            self.edge_wait[(a, b)].add(elapsed)
+
+    def _close(self, case):
+        activity, _ = self.open_cases.pop(case)
+        self._edge(activity, END, None)
+        self.cases_closed += 1
+
+    def _expire(self, now):
+        # open_cases is ordered by last activity: stop at the first fresh case
+        while self.open_cases:
+            case, (_, entered_at) = next(iter(self.open_cases.items()))
+            if now - entered_at < self.case_timeout_s:
+                break
+            self._close(case)
+
+    # --- Queries ------------------------------------------------------------
+    def where_is_time_spent(self, top=10):
+        """Activities ranked by total time spent in them, with tail percentiles."""
+        grand_total = sum(s.sum for s in self.sojourn.values()) or 1.0
+        rows = []
+        for activity, sketch in self.sojourn.items():
+            row = {"activity": activity, **sketch.summary()}
+            row["share"] = round(sketch.sum / grand_total, 4)
+            rows.append(row)
+        rows.sort(key=lambda r: r["total"], reverse=True)
+        return rows[:top]
+
+    def bottlenecks(self, top=10, quantile=0.95):
+        """Transitions ranked by tail waiting time weighted by how often they occur."""
+        rows = []
+        for (a, b), sketch in self.edge_wait.items():
+            tail = sketch.quantile(quantile)
+            rows.append({"from": a, "to": b, "impact_s": round(tail * sketch.count, 2), **sketch.summary()})
+        rows.sort(key=lambda r: r["impact_s"], reverse=True)
+        return rows[:top]
+
+    def dfg(self):
+        """Directly-follows graph: nodes with frequencies, edges with counts and waiting-time percentiles."""
+        return {
+            "nodes": dict(self.activity_counts),
+            "edges": [{"from": a, "to": b, "count": n, **(self.edge_wait[(a, b)].summary()
+                                                           if (a, b) in self.edge_wait else {})}
+                      for (a, b), n in sorted(self.edge_counts.items(), key=lambda kv: -kv[1])],
+        }
+
+    def summary(self):
+        return {
+            "events": self.events,
+            "open_cases": len(self.open_cases),
+            "closed_cases": self.cases_closed,
+            "activities": len(self.activity_counts),
+            "edges": len(self.edge_counts),
+            "watermark": datetime.fromtimestamp(self.watermark).isoformat() if self.watermark else None,
+        }
+
+
+def _to_epoch(timestamp):
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return timestamp.timestamp()
+
+
+# --- Event sources ----------------------------------------------------------
+class BPALogSource:
+    """
+    Tails `bpa_actions.log` from a byte offset. The log has no case id, so an
+    incident case is a burst of actions: a gap longer than `case_gap_s` opens a new case.
+    """
+    def __init__(self, path, case_gap_s=300, offset=0):
+        self.path = path
+        self.case_gap_s = case_gap_s
+        self.offset = offset
+        self._case = None
+        self._last_ts = None
+
+    @property
+    def identity(self):
+        return ("bpa_log", os.path.abspath(self.path))
+
+    def poll(self):
+        events = []
+        try:
+            if os.path.getsize(self.path) < self.offset:
+                self.offset = 0  # log truncated or rotated: start over on the new file
+            with open(self.path, encoding="utf-8", errors="replace") as f:
+                f.seek(self.offset)
+                while True:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        break  # partial line: re-read on next poll
+                    self.offset = f.tell()
+                    match = BPA_LOG_PATTERN.match(line)
+                    if not match:
+                        continue
+                    ts = datetime.strptime(match["ts"], "%Y-%m-%d %H:%M:%S").timestamp()
+                    if self._last_ts is None or ts - self._last_ts > self.case_gap_s:
+                        self._case = f"incident-{int(ts)}"
+                    self._last_ts = ts
+                    events.append((self._case, match["action"], ts))
+        except FileNotFoundError:
+            pass
+        return events
+
+
+class FactoryLogSource:
+    """Tails `factory_logs` by id: one case per machine, activity = status."""
+    def __init__(self, db_path, after_id=0, batch_rows=50_000):
+        self.db_path = db_path
+        self.last_id = after_id
+        self.batch_rows = batch_rows
+
+    @property
+    def identity(self):
+        return ("factory_db", os.path.abspath(self.db_path))
+
+    def poll(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT id, machine_id, status, timestamp FROM factory_logs WHERE id > ? ORDER BY id LIMIT ?",
+                (self.last_id, self.batch_rows)).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        finally:
+            conn.close()
+        if rows:
+            self.last_id = rows[-1][0]
+        return [(mid, status, ts) for _, mid, status, ts in rows]
+
+
+class MiningSession:
+    """
+    Named (source, miner) pairs that live across runs.
+    Each source cursor (log offset, last row id) is saved in the same snapshot
+    as the miner it feeds, so a restored session resumes exactly after the
+    last ingested event: no history is re-read and nothing is counted twice.
+    """
+    def __init__(self):
+        self.streams = {}  # name -> (source, miner)
+
+    def attach(self, name, source):
+        """Registers a source; a stream restored from a snapshot is kept if it reads the same origin."""
+        current = self.streams.get(name)
+        if current is None or current[0].identity != source.identity:
+            self.streams[name] = (source, ProcessMiner())
+        return self.streams[name][1]
+
+    def poll(self):
+        """Ingests everything new from every source. Returns events ingested per stream."""
+        ingested = {}
+        for name, (source, miner) in self.streams.items():
+            ingested[name] = 0
+            while True:
+                events = source.poll()
+                if not events:
+                    break
+                miner.ingest_many(events)
+                ingested[name] += len(events)
+        return ingested
+
+    def report(self, top=10):
+        return {name: {"summary": miner.summary(),
+                       "where_is_time_spent": miner.where_is_time_spent(top),
+                       "bottlenecks": miner.bottlenecks(top)}
+                for name, (_, miner) in self.streams.items()}
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restores a saved session, or a new empty one if there is none yet."""
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return cls()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Where is time spent? (streaming process mining)")
+    parser.add_argument("--bpa-log", help="path to bpa_actions.log")
+    parser.add_argument("--factory-db", help="OpenFactoryTwin SQLite database")
+    parser.add_argument("--state", help="snapshot of miners + source offsets, resumed and updated on each run")
+    parser.add_argument("--follow", type=float, default=0, help="keep polling every N seconds")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    session = MiningSession.load(args.state) if args.state else MiningSession()
+    if args.bpa_log:
+        session.attach("bpa", BPALogSource(args.bpa_log))
+    if args.factory_db:
+        session.attach("factory", FactoryLogSource(args.factory_db))
+    try:
+        while True:
+            ingested = session.poll()
+            if args.state:
+                session.save(args.state)
+            print(json.dumps({"ingested": ingested, **session.report(args.top)}, indent=2, ensure_ascii=False))
+            if args.follow <= 0:
+                break
+            time.sleep(args.follow)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    # Run the package copy of this module: pickled sessions must reference
+    # analytics.process_mining classes, not __main__ ones
+    from analytics.process_mining import main as package_main
+    package_main()
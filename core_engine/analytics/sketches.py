@@ -0,0 +1,85 @@
+import math
+
+
+class QuantileSketch:
+    """
+    Bounded-memory quantile sketch with relative-error guarantees (DDSketch).
+    Values are counted in logarithmic buckets: any quantile is returned within
+    `relative_accuracy` of the true value, updates are O(1) and memory is capped
+    at `max_buckets` (the lowest buckets are collapsed first, so the tail that
+    matters for waiting times - p95/p99 - stays exact to the accuracy).
+    """
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, weight=1):
+        value = max(0.0, float(value))
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 1e-9:
+            self.zero_count += weight
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + weight
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets + 1
+        merged = sum(self.buckets.pop(k) for k in keys[:excess])
+        target = keys[excess]
+        self.buckets[target] += merged
+
+    def merge(self, other):
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def summary(self, ndigits=2):
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "total": round(self.sum, ndigits),
+            "mean": round(self.mean, ndigits),
+            "p50": round(self.quantile(0.5), ndigits),
+            "p95": round(self.quantile(0.95), ndigits),
+            "p99": round(self.quantile(0.99), ndigits),
+            "max": round(self.max, ndigits),
+        }
@@ -0,0 +1,127 @@
+"""
+Load benchmark: one month of multi-machine factory_logs, SQLite/pandas vs the
+columnar export.
+
+    python benchmarks/columnar_load.py --machines 10 --interval 5 --days 30
+
+With --follow N the lake is built the way the continuous exporter builds it:
+one export_once() every N simulated seconds, as the rows arrive (compaction
+included), instead of a single bulk export.
+
+    python benchmarks/columnar_load.py --machines 3 --interval 10 --days 3 --follow 30
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import TelemetryExporter, load_telemetry
+
+START = datetime(2026, 9, 1)
+STATUSES = np.array(["IDLE", "WORKING", "BLOCKED", "MAINTENANCE"])
+
+
+def create_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE factory_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT,
+                    machine_id TEXT, status TEXT, consumption REAL, total_energy REAL, production_count INTEGER)""")
+    conn.commit()
+    return conn
+
+
+def insert_samples(conn, rng, machines, interval, first_s, steps):
+    """`steps` samples per machine, every `interval` s from START + first_s."""
+    n = steps * machines
+    offsets = first_s + np.repeat(np.arange(steps) * interval, machines)
+    stamps = [(START + timedelta(seconds=int(o))).isoformat() for o in offsets]
+    mids = np.tile([f"M{i + 1}" for i in range(machines)], steps)
+    status = STATUSES[rng.choice(4, n, p=[0.5, 0.4, 0.05, 0.05])]
+    cons = np.where(status == "WORKING", 5.0, 0.5) + rng.uniform(-0.5, 0.5, n)
+    conn.executemany(
+        "INSERT INTO factory_logs (timestamp, machine_id, status, consumption, total_energy, production_count) VALUES (?,?,?,?,?,?)",
+        zip(stamps, mids.tolist(), status.tolist(), cons.tolist(), np.cumsum(cons).tolist(), [0] * n),
+    )
+    conn.commit()
+    return n
+
+
+def build_db(path, machines, interval, days):
+    conn = create_db(path)
+    rng = np.random.default_rng(0)
+    steps_per_day = 86400 // interval
+    rows = sum(insert_samples(conn, rng, machines, interval, day * 86400, steps_per_day) for day in range(days))
+    conn.close()
+    return rows
+
+
+def follow_export(path, lake, fmt, machines, interval, days, poll):
+    """Rows arrive poll by poll and the exporter runs after each one, as in run_forever()."""
+    conn = create_db(path)
+    rng = np.random.default_rng(0)
+    exporter = TelemetryExporter(path, "factory_logs", lake, fmt=fmt)
+    steps = max(1, poll // interval)
+    rows = 0
+    for first_s in range(0, days * 86400, steps * interval):
+        rows += insert_samples(conn, rng, machines, interval, first_s, steps)
+        exporter.export_once()
+    conn.close()
+    return rows
+
+
+def count_files(lake):
+    return sum(len([f for f in files if f.startswith("part-")]) for _, _, files in os.walk(lake))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar telemetry load benchmark")
+    parser.add_argument("--machines", type=int, default=10)
+    parser.add_argument("--interval", type=int, default=5, help="seconds between samples per machine")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--follow", type=int, default=0, help="export every N simulated seconds (continuous mode)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "factory_twin.db")
+        lake = os.path.join(tmp, "lake")
+        t0 = time.perf_counter()
+        if args.follow:
+            rows = follow_export(db, lake, args.format, args.machines, args.interval, args.days, args.follow)
+            print(f"Follow export of {rows:,} rows ({args.follow} s polls): {time.perf_counter() - t0:6.2f} s")
+        else:
+            rows = build_db(db, args.machines, args.interval, args.days)
+            print(f"Generated {rows:,} rows")
+            t0 = time.perf_counter()
+            TelemetryExporter(db, "factory_logs", lake, fmt=args.format).export_once()
+            print(f"Export:                     {time.perf_counter() - t0:6.2f} s")
+        print(f"Files in the lake:          {count_files(lake):,}")
+
+        t0 = time.perf_counter()
+        conn = sqlite3.connect(db)
+        df = pd.read_sql_query("SELECT * FROM factory_logs", conn)
+        conn.close()
+        print(f"SQLite -> pandas (all):     {time.perf_counter() - t0:6.2f} s  "
+              f"({df.memory_usage(deep=True).sum() / 1e6:,.0f} MB)")
+
+        t0 = time.perf_counter()
+        df = load_telemetry(lake, fmt=args.format, to_pandas=True)
+        print(f"Columnar -> pandas (all):   {time.perf_counter() - t0:6.2f} s  "
+              f"({df.memory_usage(deep=True).sum() / 1e6:,.0f} MB)")
+
+        t0 = time.perf_counter()
+        table = load_telemetry(lake, fmt=args.format,
+                               columns=["timestamp", "consumption"], machine_id="M1",
+                               start=START, end=START + timedelta(days=min(7, args.days)))
+        print(f"Columnar pushdown (M1, 1w): {time.perf_counter() - t0:6.2f} s  ({table.num_rows:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Scaling benchmark for the sharded twin cluster.
+
+Runs the same fleet on 1..N worker processes with free-running ticks and
+reports simulated twin-ticks per second and the speedup over one core.
+
+    python benchmarks/shard_scaling.py --max-workers 8 --lines 2000 --substeps 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sharding import TwinCluster
+
+
+def run_once(workers, lines, sensors, plants, substeps, duration):
+    with TwinCluster(workers=workers, tick_interval=0, substeps=substeps,
+                     capacity=lines + sensors + plants) as cluster:
+        for i in range(lines):
+            cluster.add_twin(f"line-{i}", "factory_line", size=3)
+        for i in range(sensors):
+            cluster.add_twin(f"sensor-{i}", "sensor")
+        for i in range(plants):
+            cluster.add_twin(f"plant-{i}", "plant")
+
+        twins = {name: info["twins"] for name, info in cluster.describe().items()}
+        time.sleep(0.5)  # warm-up
+        start_ticks, start = cluster.ticks(), time.perf_counter()
+        time.sleep(duration)
+        end_ticks, elapsed = cluster.ticks(), time.perf_counter() - start
+        agg_start = time.perf_counter()
+        aggregate = cluster.aggregate()
+        agg_ms = (time.perf_counter() - agg_start) * 1000
+
+    twin_ticks = sum((end_ticks[n] - start_ticks[n]) * twins[n] for n in twins)
+    return {
+        "workers": workers,
+        "twin_ticks_per_s": round(twin_ticks / elapsed, 1),
+        "aggregate_ms": round(agg_ms, 3),
+        "total_factory_power_kw": aggregate["total_factory_power_kw"],
+        "fleet_anomaly_count": aggregate["fleet_anomaly_count"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Twin cluster scaling benchmark")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--sensors", type=int, default=2000)
+    parser.add_argument("--plants", type=int, default=1000)
+    parser.add_argument("--substeps", type=int, default=20, help="physics sub-steps per tick (CPU load)")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for workers in range(1, args.max_workers + 1):
+        result = run_once(workers, args.lines, args.sensors, args.plants, args.substeps, args.duration)
+        result["speedup"] = round(result["twin_ticks_per_s"] / results[0]["twin_ticks_per_s"], 2) if results else 1.0
+        results.append(result)
+        if not args.json:
+            print(f"{workers:>3} workers | {result['twin_ticks_per_s']:>12,.0f} twin-ticks/s | "
+                  f"x{result['speedup']:<5} | aggregate {result['aggregate_ms']:.2f} ms")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
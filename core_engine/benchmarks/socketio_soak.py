@@ -0,0 +1,342 @@
+"""
+Synthetic load generator and soak-test harness for the twin dashboards.
+
+Starts a twin app locally (or targets a running one with --url), connects N
+Socket.IO clients and M REST pollers, drives actuation calls at a fixed rate
+and records:
+  - end-to-end latency of each broadcast (server `emitted_at` -> client receipt),
+  - dropped frames (gaps in the server `seq`),
+  - server tick overrun (`tick_ms` vs the configured tick interval),
+  - REST latency / errors and server RSS growth over the run.
+The JSON report is meant to be diffed across async modes:
+
+    python benchmarks/socketio_soak.py --app factory --clients 50 --duration 600 --async-mode threading --out soak_threading.json
+    python benchmarks/socketio_soak.py --app factory --clients 50 --duration 600 --async-mode eventlet --out soak_eventlet.json
+
+Flask-SocketIO is a WSGI server: `asyncio` is not an available mode for these
+apps, so it is rejected up front instead of producing a misleading report.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import requests
+import socketio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import QuantileSketch
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+APPS = {
+    "temperature": {
+        "dir": "DTO Sensore Temperatura", "port": 5000, "event": "new_reading", "tick": 2.0,
+        "polls": ["/api/history"],
+        "actuators": [],
+    },
+    "factory": {
+        "dir": "OpenFactoryTwin", "port": 5001, "event": "factory_update", "tick": 1.0,
+        "polls": ["/api/state", "/api/scheduler"],
+        "actuators": [("/api/optimize", lambda: {"action": random.choice(
+            ["REDUCE_SPEED_ECO_MODE", "BOOST_PRODUCTION", "NORMAL_MODE"])})],
+    },
+    "plant": {
+        "dir": "GreenAI_PlantTwin", "port": 5002, "event": "bio_update", "tick": 1.5,
+        "polls": ["/api/state"],
+        "actuators": [("/api/fertilize", lambda: {})],
+    },
+}
+
+ASYNC_MODES = ("threading", "eventlet", "gevent")
+
+
+# --- Server -----------------------------------------------------------------
+def start_app(name, async_mode, tick_interval, workdir):
+    """Runs the twin app in a scratch directory so its SQLite files stay out of the repo."""
+    spec = APPS[name]
+    app_dir = os.path.join(REPO_ROOT, spec["dir"])
+    env = dict(os.environ, PYTHONPATH=app_dir, SOCKETIO_ASYNC_MODE=async_mode,
+               TICK_INTERVAL=str(tick_interval), PYTHONUNBUFFERED="1")
+    log = open(os.path.join(workdir, f"{name}.log"), "w")
+    process = subprocess.Popen([sys.executable, os.path.join(app_dir, "app", "main.py")],
+                               cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return process, log
+
+
+def wait_ready(url, process=None, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.3)
+    raise TimeoutError(f"Server not ready at {url}")
+
+
+def read_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1e6
+    except Exception:
+        return None
+
+
+# --- Load -------------------------------------------------------------------
+class DashboardClient:
+    """Simulated dashboard: one Socket.IO connection listening to the twin broadcast."""
+    def __init__(self, url, event, transport, tick_budget_ms):
+        self.url = url
+        self.tick_budget_ms = tick_budget_ms
+        self.transports = [transport] if transport else None
+        self.sio = socketio.Client(reconnection=True)
+        self.latency_ms = QuantileSketch()
+        self.tick_ms = QuantileSketch()
+        self.frames = 0
+        self.overruns = 0
+        self.dropped = 0
+        self.out_of_order = 0
+        self.last_seq = None
+        self.recording = False  # frames received while the other clients connect are ignored
+        self.errors = []
+        self.sio.on(event, self._on_frame)
+
+    def _on_frame(self, data):
+        now = time.time()
+        if not self.recording:
+            return
+        self.frames += 1
+        if "emitted_at" in data:
+            self.latency_ms.add((now - data["emitted_at"]) * 1000)
+        if "tick_ms" in data:
+            self.tick_ms.add(data["tick_ms"])
+            if data["tick_ms"] > self.tick_budget_ms:
+                self.overruns += 1
+        seq = data.get("seq")
+        if seq is not None:
+            if self.last_seq is not None:
+                if seq > self.last_seq + 1:
+                    self.dropped += seq - self.last_seq - 1
+                elif seq <= self.last_seq:
+                    self.out_of_order += 1
+            self.last_seq = seq if self.last_seq is None else max(seq, self.last_seq)
+
+    def connect(self):
+        try:
+            self.sio.connect(self.url, transports=self.transports, wait_timeout=10)
+        except Exception as e:
+            self.errors.append(str(e))
+
+    def close(self):
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+
+def rate_loop(stop, rate, action):
+    """Calls `action` `rate` times per second until stop is set."""
+    period = 1.0 / rate
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        action()
+        next_at += period
+        stop.wait(max(0.0, next_at - time.perf_counter()))
+
+
+class HttpStats:
+    def __init__(self):
+        self.latency_ms = QuantileSketch()
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def call(self, session, method, url, payload=None):
+        t0 = time.perf_counter()
+        try:
+            response = session.request(method, url, json=payload, timeout=10)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        with self.lock:
+            self.latency_ms.add((time.perf_counter() - t0) * 1000)
+            if not ok:
+                self.errors += 1
+
+
+def run_soak(args):
+    spec = APPS[args.app]
+    tick = args.tick_interval or spec["tick"]
+    url = args.url or f"http://localhost:{spec['port']}"
+    workdir = tempfile.mkdtemp(prefix="dtf_soak_")
+    process = log = None
+    if not args.url:
+        process, log = start_app(args.app, args.async_mode, tick, workdir)
+    try:
+        try:
+            wait_ready(url, process)
+        except RuntimeError as e:
+            log.flush()
+            with open(log.name) as f:
+                tail = "".join(f.readlines()[-20:])
+            raise RuntimeError(f"{e}, server log tail:\n{tail}")
+        pid = process.pid if process else args.pid
+
+        clients = [DashboardClient(url, spec["event"], args.transport, tick * 1000) for _ in range(args.clients)]
+        for client in clients:
+            client.connect()
+
+        stop = threading.Event()
+        threads = []
+        poll_stats, act_stats = HttpStats(), HttpStats()
+        for i in range(args.pollers):
+            session, path = requests.Session(), spec["polls"][i % len(spec["polls"])]
+            threads.append(threading.Thread(target=rate_loop, daemon=True, args=(
+                stop, args.poll_rate, lambda s=session, p=path: poll_stats.call(s, "GET", url + p))))
+        if args.actuation_rate > 0:
+            for path, payload in spec["actuators"]:
+                session = requests.Session()
+                threads.append(threading.Thread(target=rate_loop, daemon=True, args=(
+                    stop, args.actuation_rate,
+                    lambda s=session, p=path, f=payload: act_stats.call(s, "POST", url + p, f()))))
+
+        memory = []
+        def sample_memory():
+            rss = read_rss_mb(pid) if pid else None
+            if rss is not None:
+                memory.append((round(time.time() - started, 1), round(rss, 2)))
+        started = time.time()
+        for client in clients:
+            client.recording = True
+        threads.append(threading.Thread(target=rate_loop, daemon=True,
+                                        args=(stop, 1.0 / args.memory_interval, sample_memory)))
+        for t in threads:
+            t.start()
+
+        time.sleep(args.duration)
+        stop.set()
+        elapsed = time.time() - started
+        for client in clients:
+            client.recording = False
+        for client in clients:
+            client.close()
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            log.close()
+        # Scratch SQLite DBs and the server log: one directory per run, removed unless asked to keep it
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = build_report(args, tick, url, elapsed, clients, poll_stats, act_stats, memory)
+    report["config"]["server_log"] = log.name if log and args.keep_workdir else None
+    return report
+
+
+def build_report(args, tick, url, elapsed, clients, poll_stats, act_stats, memory):
+    latency = QuantileSketch()
+    for client in clients:
+        latency.merge(client.latency_ms)
+    frames = sum(c.frames for c in clients)
+    dropped = sum(c.dropped for c in clients)
+    expected = args.clients * elapsed / tick
+    # Every client sees the same tick_ms stream: the best-connected one is the reference
+    reference = max(clients, key=lambda c: c.tick_ms.count, default=None)
+
+    rss = [m for _, m in memory]
+    growth_mb_h = None
+    if len(memory) >= 2 and memory[-1][0] > memory[0][0]:
+        growth_mb_h = round((memory[-1][1] - memory[0][1]) / (memory[-1][0] - memory[0][0]) * 3600, 2)
+
+    return {
+        "config": {
+            "app": args.app, "url": url, "async_mode": args.async_mode if not args.url else "external",
+            "clients": args.clients, "pollers": args.pollers, "poll_rate_hz": args.poll_rate,
+            "actuation_rate_hz": args.actuation_rate, "tick_interval_s": tick,
+            "transport": args.transport or "auto", "duration_s": round(elapsed, 1),
+            "generated": datetime.now().isoformat(), "python": platform.python_version(),
+        },
+        "socketio": {
+            "connected": sum(1 for c in clients if c.sio.connected or c.frames),
+            "connect_errors": sum(len(c.errors) for c in clients),
+            "frames_received": frames,
+            "frames_expected": round(expected),
+            "dropped_frames": dropped,
+            "out_of_order": sum(c.out_of_order for c in clients),
+            "delivery_ratio": round(frames / expected, 4) if expected else None,
+            "latency_ms": latency.summary(),
+        },
+        "server_tick": {
+            "budget_ms": tick * 1000,
+            "tick_ms": reference.tick_ms.summary() if reference else {"count": 0},
+            "overruns": reference.overruns if reference else 0,
+        },
+        "rest": {"polls": {"errors": poll_stats.errors, "latency_ms": poll_stats.latency_ms.summary()},
+                 "actuations": {"errors": act_stats.errors, "latency_ms": act_stats.latency_ms.summary()}},
+        "memory": {
+            "rss_start_mb": rss[0] if rss else None,
+            "rss_end_mb": rss[-1] if rss else None,
+            "rss_peak_mb": max(rss) if rss else None,
+            "growth_mb_per_hour": growth_mb_h,
+            "samples": memory,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket.IO / REST soak test for the twin apps")
+    parser.add_argument("--app", choices=list(APPS), default="factory")
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="server pid for memory sampling when using --url")
+    parser.add_argument("--async-mode", default="threading", help=f"server async mode ({', '.join(ASYNC_MODES)})")
+    parser.add_argument("--clients", type=int, default=20, help="simulated dashboard clients")
+    parser.add_argument("--pollers", type=int, default=2, help="REST pollers (n8n style)")
+    parser.add_argument("--poll-rate", type=float, default=1.0, help="requests/s per poller")
+    parser.add_argument("--actuation-rate", type=float, default=0.2, help="actuation calls/s per actuator endpoint")
+    parser.add_argument("--tick-interval", type=float, help="server sensor tick (s), default: app default")
+    parser.add_argument("--transport", choices=["websocket", "polling"], help="force a Socket.IO transport")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--memory-interval", type=float, default=5.0, help="seconds between RSS samples")
+    parser.add_argument("--out", help="write the JSON report to this file")
+    parser.add_argument("--keep-workdir", action="store_true",
+                        help="keep the scratch directory (server SQLite files and log) after the run")
+    args = parser.parse_args()
+
+    if args.async_mode not in ASYNC_MODES:
+        parser.error(f"async mode '{args.async_mode}' is not supported by Flask-SocketIO apps "
+                     f"(choose from {', '.join(ASYNC_MODES)})")
+
+    report = run_soak(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+        print(f"📄 Report written to {args.out}")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
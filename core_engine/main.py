@@ -1,15 +1,35 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 import os
 import uvicorn
+from sharding import TwinCluster, ClusterUnavailableError, ShardFullError, LastWorkerError
 
 # Environment Variables injected by Docker Compose
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))  # 0 = twin cluster disabled
 
 app = FastAPI(title="DTO Core Engine Base")
 
+cluster = None
+
+@app.on_event("startup")
+def start_cluster():
+    global cluster
+    if SHARD_WORKERS > 0:
+        cluster = TwinCluster(workers=SHARD_WORKERS).start()
+
+@app.on_event("shutdown")
+def stop_cluster():
+    if cluster is not None:
+        cluster.shutdown()
+
+def _require_cluster():
+    if cluster is None:
+        raise HTTPException(status_code=503, detail="Twin cluster disabled (set SHARD_WORKERS)")
+    return cluster
+
 @app.get("/")
 def read_root():
     return {
@@ -26,5 +46,52 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/cluster/aggregate")
+def cluster_aggregate():
+    """Scatter-gather over shard shared memory: total factory power, fleet anomalies..."""
+    return _require_cluster().aggregate()
+
+@app.get("/cluster/workers")
+def cluster_workers():
+    return _require_cluster().describe()
+
+@app.post("/cluster/workers")
+def cluster_add_worker():
+    try:
+        return _require_cluster().add_worker()
+    except ShardFullError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (ClusterUnavailableError, TimeoutError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.delete("/cluster/workers/{name}")
+def cluster_remove_worker(name: str):
+    try:
+        return _require_cluster().remove_worker(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown worker {name}")
+    except (LastWorkerError, ShardFullError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (ClusterUnavailableError, TimeoutError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.post("/cluster/twins/{twin_id}")
+def cluster_add_twin(twin_id: str, kind: str, size: int = 1):
+    try:
+        return {"twin_id": twin_id, "worker": _require_cluster().add_twin(twin_id, kind, size)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ShardFullError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (ClusterUnavailableError, TimeoutError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.get("/cluster/twins/{twin_id}")
+def cluster_get_twin(twin_id: str):
+    try:
+        return _require_cluster().get_twin(twin_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown twin {twin_id}")
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,7 @@
+from .hash_ring import ConsistentHashRing
+from .broker import LocalBroker
+from .cluster import TwinCluster
+from .shard_state import ShardState, TWIN_KINDS, ClusterUnavailableError, WorkerLostError, ShardFullError, LastWorkerError
+
+__all__ = ["ConsistentHashRing", "LocalBroker", "TwinCluster", "ShardState", "TWIN_KINDS",
+           "ClusterUnavailableError", "WorkerLostError", "ShardFullError", "LastWorkerError"]
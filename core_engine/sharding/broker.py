@@ -0,0 +1,37 @@
+import multiprocessing as mp
+
+
+class LocalBroker:
+    """
+    Local stand-in for the Redis event bus (REDIS_URL in docker-compose).
+    Every shard worker is addressed by name through a channel, so the cluster
+    never talks to a process handle directly: swapping this class for a
+    Redis Streams client is enough to place shards on other nodes.
+    """
+    COORDINATOR = "coordinator"
+
+    @classmethod
+    def replies(cls, name):
+        """Per-worker reply channel: a worker killed mid-write can't wedge the others' replies."""
+        return f"{cls.COORDINATOR}:{name}"
+
+    def __init__(self, ctx=None):
+        self._ctx = ctx or mp.get_context("spawn")
+        self._channels = {}
+
+    def channel(self, name):
+        if name not in self._channels:
+            self._channels[name] = self._ctx.Queue()
+        return self._channels[name]
+
+    def publish(self, name, message):
+        self.channel(name).put(message)
+
+    def receive(self, name, timeout=None):
+        return self.channel(name).get(timeout=timeout)
+
+    def close(self, name):
+        queue = self._channels.pop(name, None)
+        if queue is not None:
+            queue.close()
+            queue.join_thread()
@@ -0,0 +1,303 @@
+import itertools
+import queue
+import threading
+import time
+import multiprocessing as mp
+import numpy as np
+
+from .broker import LocalBroker
+from .hash_ring import ConsistentHashRing
+from .shard_state import (
+    ShardState, ClusterUnavailableError, WorkerLostError, ShardFullError, LastWorkerError, TWIN_KINDS, KIND_NAMES, COL_KIND, COL_VALUE, COL_POWER_KW,
+    COL_ENERGY_KWH, COL_PRODUCTION, COL_ANOMALIES, COL_SIZE, HDR_TICKS, HDR_ACTIVE,
+)
+from .worker import run_worker
+
+
+class TwinCluster:
+    """
+    Spreads twin instances (sensors, plants, factory lines) over a pool of
+    shard worker processes placed on a consistent-hash ring.
+    Commands go through the broker; aggregate queries are served by
+    scatter-gather reads of each shard's shared-memory state table.
+    Shards whose process died are detected on the next request or query and
+    removed, their twins recovered from the last shared-memory snapshot.
+    """
+    def __init__(self, workers=2, capacity=4096, tick_interval=1.0, sim_dt=1.0, substeps=1,
+                 broker=None, replicas=64, request_timeout=10.0):
+        self.initial_workers = workers
+        self.capacity = capacity
+        self.tick_interval = tick_interval
+        self.sim_dt = sim_dt
+        self.substeps = substeps
+        self.request_timeout = request_timeout
+        self._ctx = mp.get_context("spawn")
+        self.broker = broker or LocalBroker(self._ctx)
+        self.ring = ConsistentHashRing(replicas=replicas)
+        self.workers = {}    # name -> {"process", "state"}
+        self.placement = {}  # twin_id -> {"worker", "slot", "kind"}
+        self._lock = threading.RLock()
+        self._req_ids = itertools.count(1)
+        self._names = itertools.count(0)
+
+    # --- Lifecycle ----------------------------------------------------------
+    def start(self):
+        for _ in range(self.initial_workers):
+            self.add_worker()
+        return self
+
+    def shutdown(self):
+        with self._lock:
+            for name in list(self.workers):
+                self._stop_worker(name)
+            self.placement.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    # --- Membership & rebalancing ------------------------------------------
+    def add_worker(self, name=None):
+        """Spawns a new shard and moves onto it the twins it now owns."""
+        with self._lock:
+            name = name or f"shard-{next(self._names)}"
+            if name in self.workers:
+                raise ValueError(f"Worker {name} already exists")
+            state = ShardState.create(self.capacity)
+            process = self._ctx.Process(
+                target=run_worker,
+                args=(name, state.name, self.capacity, self.broker.channel(name),
+                      self.broker.channel(LocalBroker.replies(name)),
+                      self.tick_interval, self.sim_dt, self.substeps, None),
+                name=f"dtf-{name}", daemon=True,
+            )
+            process.start()
+            self.workers[name] = {"process": process, "state": state}
+            try:
+                self._request(name, "ping")
+            except Exception:
+                self._stop_worker(name)  # never became routable
+                raise
+            # Routable only once it answered
+            self.ring.add_node(name)
+            return {"worker": name, "moved": self._rebalance()}
+
+    def remove_worker(self, name):
+        """
+        Removes a shard and re-homes its twins on the remaining workers.
+        If the worker process already died its twins are recovered from the
+        last consistent shared-memory snapshot.
+        """
+        with self._lock:
+            if name not in self.workers:
+                raise KeyError(name)
+            if len(self.workers) == 1 and self.placement:
+                raise LastWorkerError("Cannot remove the last worker while twins are hosted")
+            self.ring.remove_node(name)
+            try:
+                moved = self._rebalance()
+            except Exception:
+                # Twins not yet moved still live on this shard: keep it routable
+                self.ring.add_node(name)
+                raise
+            self._stop_worker(name)
+            return {"worker": name, "moved": moved}
+
+    def reap_dead_workers(self):
+        """
+        Removes every shard whose process died. Returns their names.
+        All dead shards leave the ring before the single rebalance, so no
+        twin is ever migrated onto another shard that has died too.
+        """
+        with self._lock:
+            dead = [name for name in self.workers if not self._alive(name)]
+            if not dead:
+                return dead
+            for name in dead:
+                print(f"⚠️ Shard {name} died, recovering its twins")
+                self.ring.remove_node(name)
+            if len(self.ring) == 0:
+                self.add_worker()  # replacement, so the twins have somewhere to go (rebalances)
+            else:
+                self._rebalance()
+            for name in dead:
+                self._stop_worker(name)
+            return dead
+
+    def _rebalance(self):
+        moved = 0
+        for twin_id, place in list(self.placement.items()):
+            target = self.ring.get_node(twin_id)
+            if target != place["worker"]:
+                self._migrate(twin_id, target, dead=not self._alive(place["worker"]))
+                moved += 1
+        return moved
+
+    def _migrate(self, twin_id, target, dead=False):
+        """Moves one twin; if the target refuses it, the row goes back to the source."""
+        place = self.placement[twin_id]
+        source = place["worker"]
+        if dead:
+            row = self._last_row(source, place["slot"])
+        else:
+            row = self._request(source, "remove", twin_id=twin_id)["row"]
+        try:
+            reply = self._request(target, "add", twin_id=twin_id, kind=place["kind"], row=row)
+        except (RuntimeError, TimeoutError):
+            if not dead:
+                back = self._request(source, "add", twin_id=twin_id, kind=place["kind"], row=row)
+                self.placement[twin_id] = {**place, "slot": back["slot"]}
+            raise
+        self.placement[twin_id] = {"worker": target, "slot": reply["slot"], "kind": place["kind"]}
+
+    def _last_row(self, name, slot):
+        """Row of a dead shard: last stable snapshot, or the raw row if it died mid-publish."""
+        state = self.workers[name]["state"]
+        try:
+            rows, _ = state.snapshot(rows=[slot], timeout=0.2)
+            return rows[0].tolist()
+        except RuntimeError:
+            return state.table[slot].tolist()
+
+    def _stop_worker(self, name):
+        worker = self.workers[name]
+        self.ring.remove_node(name)
+        if worker["process"].is_alive():
+            try:
+                self._request(name, "stop")
+            except (TimeoutError, WorkerLostError):
+                worker["process"].terminate()
+        worker["process"].join(timeout=5)
+        del self.workers[name]
+        worker["state"].close()
+        self.broker.close(name)
+        self.broker.close(LocalBroker.replies(name))
+
+    def _alive(self, name):
+        return self.workers[name]["process"].is_alive()
+
+    # --- Broker round-trip --------------------------------------------------
+    def _request(self, worker, op, **payload):
+        with self._lock:
+            req_id = next(self._req_ids)
+            self.broker.publish(worker, {"id": req_id, "op": op, **payload})
+            deadline = time.monotonic() + self.request_timeout
+            while True:
+                try:
+                    # Short waits, so a dead worker is noticed long before the timeout
+                    reply = self.broker.receive(LocalBroker.replies(worker), timeout=0.2)
+                except queue.Empty:
+                    if not self._alive(worker):
+                        raise WorkerLostError(f"Worker {worker} died during '{op}'")
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Worker {worker} did not answer '{op}'")
+                    continue
+                if reply["id"] == req_id:
+                    break
+            if not reply["ok"]:
+                error = ShardFullError if reply.get("error_type") == "ShardFullError" else RuntimeError
+                raise error(f"Worker {worker}: {reply['error']}")
+            return reply
+
+    # --- Twins --------------------------------------------------------------
+    def add_twin(self, twin_id, kind, size=1):
+        if kind not in TWIN_KINDS:
+            raise ValueError(f"Unknown twin kind: {kind}")
+        with self._lock:
+            if twin_id in self.placement:
+                raise ValueError(f"Twin {twin_id} already exists")
+            self.reap_dead_workers()
+            for attempt in range(2):
+                worker = self.ring.get_node(twin_id)
+                if worker is None:
+                    raise ClusterUnavailableError("No workers available")
+                try:
+                    reply = self._request(worker, "add", twin_id=twin_id, kind=kind, size=size)
+                    break
+                except WorkerLostError:
+                    if attempt:
+                        raise
+                    self.reap_dead_workers()  # the key now maps to a live shard
+            self.placement[twin_id] = {"worker": worker, "slot": reply["slot"], "kind": kind}
+            return worker
+
+    def remove_twin(self, twin_id):
+        with self._lock:
+            self.reap_dead_workers()
+            place = self.placement.pop(twin_id)
+            return self._request(place["worker"], "remove", twin_id=twin_id)["row"]
+
+    def get_twin(self, twin_id):
+        """Point query: reads a single row straight from the owning shard."""
+        with self._lock:
+            self.reap_dead_workers()
+            place = self.placement[twin_id]
+            rows, _ = self.workers[place["worker"]]["state"].snapshot(rows=[place["slot"]])
+        return self._row_to_dict(twin_id, place["worker"], rows[0])
+
+    @staticmethod
+    def _row_to_dict(twin_id, worker, row):
+        return {
+            "twin_id": twin_id,
+            "worker": worker,
+            "kind": KIND_NAMES.get(int(row[COL_KIND])),
+            "value": round(float(row[COL_VALUE]), 2),
+            "power_kw": round(float(row[COL_POWER_KW]), 3),
+            "energy_kwh": round(float(row[COL_ENERGY_KWH]), 4),
+            "production": int(row[COL_PRODUCTION]),
+            "anomalies": int(row[COL_ANOMALIES]),
+            "size": int(row[COL_SIZE]),
+        }
+
+    # --- Scatter-gather aggregates -----------------------------------------
+    def _gather(self):
+        """Scatter: snapshot every shard. Gather: list of (worker, table, header)."""
+        with self._lock:
+            self.reap_dead_workers()  # a dead shard's table is frozen: re-home its twins first
+            states = [(name, w["state"]) for name, w in self.workers.items()]
+        return [(name, *state.snapshot()) for name, state in states]
+
+    def aggregate(self):
+        shards = {}
+        totals = {"total_factory_power_kw": 0.0, "total_energy_kwh": 0.0, "total_production": 0,
+                  "fleet_anomaly_count": 0, "twins": {k: 0 for k in TWIN_KINDS}}
+        for name, table, header in self._gather():
+            kinds = table[:, COL_KIND]
+            lines = kinds == TWIN_KINDS["factory_line"]
+            shard = {
+                "twins": int(header[HDR_ACTIVE]),
+                "ticks": int(header[HDR_TICKS]),
+                "factory_power_kw": float(table[lines, COL_POWER_KW].sum()),
+                "energy_kwh": float(table[kinds > 0, COL_ENERGY_KWH].sum()),
+                "production": int(np.floor(table[lines, COL_PRODUCTION]).sum()),
+                "anomalies": int(table[kinds > 0, COL_ANOMALIES].sum()),
+            }
+            shards[name] = shard
+            totals["total_factory_power_kw"] += shard["factory_power_kw"]
+            totals["total_energy_kwh"] += shard["energy_kwh"]
+            totals["total_production"] += shard["production"]
+            totals["fleet_anomaly_count"] += shard["anomalies"]
+            for kind, code in TWIN_KINDS.items():
+                totals["twins"][kind] += int((kinds == code).sum())
+        totals["total_factory_power_kw"] = round(totals["total_factory_power_kw"], 2)
+        totals["total_energy_kwh"] = round(totals["total_energy_kwh"], 4)
+        totals["shards"] = shards
+        return totals
+
+    def total_factory_power(self):
+        return self.aggregate()["total_factory_power_kw"]
+
+    def fleet_anomaly_count(self):
+        return self.aggregate()["fleet_anomaly_count"]
+
+    def ticks(self):
+        """Ticks completed per shard, read from the shared-memory headers."""
+        return {name: int(header[HDR_TICKS]) for name, _, header in self._gather()}
+
+    def describe(self):
+        with self._lock:
+            return {name: {"pid": w["process"].pid, "alive": w["process"].is_alive(),
+                           "twins": sum(1 for p in self.placement.values() if p["worker"] == name)}
+                    for name, w in self.workers.items()}
@@ -0,0 +1,52 @@
+import bisect
+import hashlib
+
+
+class ConsistentHashRing:
+    """
+    Consistent-hash ring with virtual nodes.
+    Each worker owns `replicas` points on the ring, so adding or removing a
+    worker only moves the twins that fall between its points (~1/N of the fleet).
+    """
+    def __init__(self, nodes=None, replicas=64):
+        self.replicas = replicas
+        self._keys = []      # sorted ring positions
+        self._owners = {}    # ring position -> node name
+        self.nodes = set()
+        for node in nodes or []:
+            self.add_node(node)
+
+    @staticmethod
+    def _hash(key):
+        digest = hashlib.md5(str(key).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def add_node(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.replicas):
+            pos = self._hash(f"{node}#{i}")
+            bisect.insort(self._keys, pos)
+            self._owners[pos] = node
+
+    def remove_node(self, node):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        for i in range(self.replicas):
+            pos = self._hash(f"{node}#{i}")
+            idx = bisect.bisect_left(self._keys, pos)
+            if idx < len(self._keys) and self._keys[idx] == pos:
+                self._keys.pop(idx)
+            self._owners.pop(pos, None)
+
+    def get_node(self, key):
+        """Returns the node that owns `key` (first ring point clockwise)."""
+        if not self._keys:
+            return None
+        idx = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._owners[self._keys[idx]]
+
+    def __len__(self):
+        return len(self.nodes)
@@ -0,0 +1,102 @@
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+# Twin kinds hosted by the cluster (0 = free slot)
+TWIN_KINDS = {"sensor": 1, "plant": 2, "factory_line": 3}
+KIND_NAMES = {v: k for k, v in TWIN_KINDS.items()}
+
+# Column layout of the per-shard state table
+COL_KIND = 0
+COL_VALUE = 1        # temperature (sensor) / soil moisture (plant)
+COL_POWER_KW = 2
+COL_ENERGY_KWH = 3
+COL_PRODUCTION = 4
+COL_ANOMALIES = 5
+COL_SIZE = 6         # machines per factory line
+N_COLS = 7
+
+# Header: [seq, ticks, active twins, reserved]
+HDR_SEQ = 0
+HDR_TICKS = 1
+HDR_ACTIVE = 2
+HEADER_SLOTS = 4
+HEADER_BYTES = HEADER_SLOTS * 8
+
+
+class ClusterUnavailableError(RuntimeError):
+    """No live shard can serve the request (no workers, or the owner died)."""
+
+
+class WorkerLostError(ClusterUnavailableError):
+    """The shard process died while a request was pending."""
+
+
+class ShardFullError(RuntimeError):
+    """The owning shard has no free slot left."""
+
+
+class LastWorkerError(RuntimeError):
+    """The only shard can't be removed while it still hosts twins."""
+
+
+class ShardState:
+    """
+    Shared-memory state table of one shard.
+    The owning worker publishes a copy of its private table after every tick;
+    the coordinator reads it without any message round-trip. Consistency is
+    guaranteed by a seqlock: the writer bumps `seq` to odd before copying and
+    back to even afterwards, readers retry until they copy a stable version.
+    """
+    def __init__(self, shm, capacity, owner=False):
+        self.shm = shm
+        self.capacity = capacity
+        self.owner = owner
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        self.table = np.ndarray((capacity, N_COLS), dtype=np.float64,
+                                buffer=shm.buf, offset=HEADER_BYTES)
+
+    @classmethod
+    def create(cls, capacity):
+        size = HEADER_BYTES + capacity * N_COLS * 8
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        state = cls(shm, capacity, owner=True)
+        state.header[:] = 0
+        state.table[:] = 0.0
+        return state
+
+    @classmethod
+    def attach(cls, name, capacity):
+        return cls(shared_memory.SharedMemory(name=name), capacity)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def begin_write(self):
+        self.header[HDR_SEQ] += 1
+
+    def end_write(self):
+        self.header[HDR_SEQ] += 1
+
+    def snapshot(self, rows=None, timeout=1.0):
+        """Returns a consistent copy of (table or selected rows, header)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            seq = int(self.header[HDR_SEQ])
+            if seq % 2:
+                time.sleep(0)  # let the writer finish its publish
+                continue
+            table = self.table.copy() if rows is None else self.table[rows].copy()
+            header = self.header.copy()
+            if int(self.header[HDR_SEQ]) == seq:
+                return table, header
+        raise RuntimeError(f"Shard {self.name}: unable to read a stable snapshot")
+
+    def close(self):
+        # Views on the buffer must be released before closing the mapping
+        del self.header
+        del self.table
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
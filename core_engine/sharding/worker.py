@@ -0,0 +1,170 @@
+import queue
+import time
+import numpy as np
+
+from .shard_state import (
+    ShardState, ShardFullError, TWIN_KINDS, COL_KIND, COL_VALUE, COL_POWER_KW,
+    COL_ENERGY_KWH, COL_PRODUCTION, COL_ANOMALIES, COL_SIZE, HDR_TICKS, HDR_ACTIVE,
+)
+
+SENSOR, PLANT, FACTORY_LINE = TWIN_KINDS["sensor"], TWIN_KINDS["plant"], TWIN_KINDS["factory_line"]
+
+# Simplified physics: shards do not run the standalone twins' code. These are
+# copies of their nominal constants (DTO sensor simulator, PlantTwin pump,
+# Machine.__init__/Machine.work, FactoryTwin.energy_limit) and must be kept in
+# sync by hand. Factory lines have no PowerCapScheduler: machines start at
+# random and a tick whose draw exceeds the line's share of the cap counts as
+# an anomaly (the standalone twin would have deferred those starts).
+SENSOR_BASE_TEMP = 22.0
+SENSOR_POWER_KW = 0.005
+PLANT_PUMP_KW = 0.2
+PLANT_IDLE_KW = 0.05
+MACHINE_IDLE_KW = 0.5
+MACHINE_WORKING_KW = 5.0
+MACHINE_CYCLE_S = 3.5        # mean of Machine.work processing time
+LINE_ENERGY_LIMIT_KW = 12.0  # FactoryTwin.energy_limit for a 3-machine line
+
+
+class ShardWorker:
+    """Simulates every twin of one shard with vectorized numpy ticks."""
+    def __init__(self, name, state, inbox, outbox, tick_interval=1.0, sim_dt=1.0, substeps=1, seed=None):
+        self.name = name
+        self.state = state
+        self.inbox = inbox
+        self.outbox = outbox
+        self.tick_interval = tick_interval
+        self.sim_dt = sim_dt
+        self.substeps = max(1, int(substeps))
+        self.rng = np.random.default_rng(seed)
+        # Ticks run on a private table; readers only ever see published copies
+        self.table = state.table.copy()
+        self.ticks = int(state.header[HDR_TICKS])
+        self.slots = {}  # twin_id -> slot
+        self.free = list(range(state.capacity - 1, -1, -1))
+        self._index = {}
+        self.running = True
+
+    # --- Commands -----------------------------------------------------------
+    def handle(self, msg):
+        op = msg["op"]
+        reply = {"id": msg["id"], "worker": self.name, "ok": True}
+        try:
+            if op == "add":
+                reply["slot"] = self._add(msg["twin_id"], msg["kind"], msg.get("size", 1), msg.get("row"))
+            elif op == "remove":
+                reply["row"] = self._remove(msg["twin_id"])
+            elif op == "stop":
+                self.running = False
+            elif op != "ping":
+                raise ValueError(f"Unknown op: {op}")
+        except Exception as e:
+            reply.update(ok=False, error=str(e), error_type=type(e).__name__)
+        self.outbox.put(reply)
+
+    def _add(self, twin_id, kind, size, row):
+        if twin_id in self.slots:
+            raise ValueError(f"Twin {twin_id} already hosted on {self.name}")
+        if not self.free:
+            raise ShardFullError(f"Shard {self.name} is full ({self.state.capacity} twins)")
+        slot = self.free.pop()
+        if row is not None:
+            self.table[slot] = row
+        else:
+            self.table[slot] = 0.0
+            self.table[slot, COL_KIND] = TWIN_KINDS[kind]
+            self.table[slot, COL_SIZE] = size
+            self.table[slot, COL_VALUE] = {"sensor": SENSOR_BASE_TEMP, "plant": 60.0}.get(kind, 0.0)
+        self.slots[twin_id] = slot
+        self._reindex()
+        self.publish()
+        return slot
+
+    def _remove(self, twin_id):
+        slot = self.slots.pop(twin_id)
+        row = self.table[slot].tolist()
+        self.table[slot] = 0.0
+        self.free.append(slot)
+        self._reindex()
+        self.publish()
+        return row
+
+    def _reindex(self):
+        kinds = self.table[:, COL_KIND]
+        self._index = {
+            "active": np.flatnonzero(kinds > 0),
+            SENSOR: np.flatnonzero(kinds == SENSOR),
+            PLANT: np.flatnonzero(kinds == PLANT),
+            FACTORY_LINE: np.flatnonzero(kinds == FACTORY_LINE),
+        }
+
+    def publish(self):
+        """Copies the private table into shared memory inside a short seqlock window."""
+        self.state.begin_write()
+        self.state.table[:] = self.table
+        self.state.header[HDR_TICKS] = self.ticks
+        self.state.header[HDR_ACTIVE] = len(self.slots)
+        self.state.end_write()
+
+    # --- Simulation ---------------------------------------------------------
+    def tick(self):
+        t = self.table
+        dt = self.sim_dt / self.substeps
+        sensors, plants, lines = self._index[SENSOR], self._index[PLANT], self._index[FACTORY_LINE]
+
+        for _ in range(self.substeps):
+            if len(sensors):
+                temp = t[sensors, COL_VALUE]
+                temp += 0.1 * (SENSOR_BASE_TEMP - temp) * dt + self.rng.normal(0, 0.3 * np.sqrt(dt), len(sensors))
+                spikes = self.rng.random(len(sensors)) < 0.05 * dt
+                temp[spikes] += self.rng.uniform(5.0, 10.0, spikes.sum()) * np.where(self.rng.random(spikes.sum()) > 0.4, 1, -1)
+                t[sensors, COL_VALUE] = temp
+                t[sensors, COL_POWER_KW] = SENSOR_POWER_KW
+                t[sensors, COL_ANOMALIES] += spikes
+
+            if len(plants):
+                moisture = t[plants, COL_VALUE] - 0.8 * dt * self.rng.uniform(0.5, 1.5, len(plants))
+                drought = moisture < 30.0
+                moisture[drought] += 25.0
+                t[plants, COL_VALUE] = moisture
+                t[plants, COL_POWER_KW] = PLANT_IDLE_KW + PLANT_PUMP_KW * drought
+                t[plants, COL_ANOMALIES] += drought
+
+            if len(lines):
+                size = t[lines, COL_SIZE]
+                working = self.rng.binomial(size.astype(np.int64), 0.6)
+                power = size * MACHINE_IDLE_KW + working * (MACHINE_WORKING_KW - MACHINE_IDLE_KW)
+                power += self.rng.uniform(-0.5, 0.5, len(lines)) * np.sqrt(working)
+                t[lines, COL_POWER_KW] = power
+                t[lines, COL_PRODUCTION] += working * dt / MACHINE_CYCLE_S
+                t[lines, COL_ANOMALIES] += power > LINE_ENERGY_LIMIT_KW * size / 3.0
+
+            active = self._index["active"]
+            t[active, COL_ENERGY_KWH] += t[active, COL_POWER_KW] * dt / 3600
+        self.ticks += 1
+        self.publish()
+
+    def run(self):
+        while self.running:
+            idle = not self.slots
+            try:
+                # Block while the shard is empty, otherwise just drain pending commands
+                msg = self.inbox.get(timeout=0.5) if idle else self.inbox.get_nowait()
+                self.handle(msg)
+                continue
+            except queue.Empty:
+                pass
+            if idle:
+                continue
+            self.tick()
+            if self.tick_interval > 0:
+                time.sleep(self.tick_interval)
+
+
+def run_worker(name, shm_name, capacity, inbox, outbox, tick_interval, sim_dt, substeps, seed):
+    """Process entry point of a shard worker."""
+    state = ShardState.attach(shm_name, capacity)
+    worker = ShardWorker(name, state, inbox, outbox, tick_interval, sim_dt, substeps, seed)
+    try:
+        worker.run()
+    finally:
+        state.close()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules are imported as in the app (`from sharding import ...`), with core_engine/ as root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
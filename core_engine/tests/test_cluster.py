@@ -0,0 +1,96 @@
+import pytest
+
+from sharding import TwinCluster, ShardFullError, LastWorkerError
+
+
+@pytest.fixture
+def cluster():
+    cluster = TwinCluster(workers=2, capacity=64, tick_interval=0.01, request_timeout=5.0).start()
+    yield cluster
+    cluster.shutdown()
+
+
+def test_dead_worker_is_reaped_and_its_twins_recovered(cluster):
+    for i in range(20):
+        cluster.add_twin(f"line-{i}", "factory_line", size=3)
+    victim = next(iter(cluster.workers))
+    hosted = [t for t, p in cluster.placement.items() if p["worker"] == victim]
+    assert hosted
+    cluster.workers[victim]["process"].kill()
+    cluster.workers[victim]["process"].join(5)
+
+    totals = cluster.aggregate()
+    assert victim not in cluster.workers
+    assert victim not in totals["shards"]
+    assert totals["twins"]["factory_line"] == 20
+    assert all(cluster.get_twin(t)["worker"] != victim for t in hosted)
+
+
+def test_last_dead_worker_gets_a_replacement():
+    with TwinCluster(workers=1, capacity=16, tick_interval=0.01, request_timeout=5.0) as cluster:
+        cluster.add_twin("s1", "sensor")
+        only = next(iter(cluster.workers))
+        cluster.workers[only]["process"].kill()
+        cluster.workers[only]["process"].join(5)
+        cluster.add_twin("s2", "sensor")
+        assert only not in cluster.workers and len(cluster.workers) == 1
+        assert cluster.get_twin("s1")["kind"] == "sensor"
+
+
+def test_failed_migration_puts_the_twin_back_on_its_source(cluster):
+    source, target = list(cluster.workers)
+    cluster.remove_worker(target)
+    for i in range(64):  # fill the remaining shard: every twin lives on `source`
+        cluster.add_twin(f"s{i}", "sensor")
+    cluster.add_worker("full")
+    # The new shard can't take anything more: a migration onto it must roll back
+    for i in range(64):
+        try:
+            cluster.add_twin(f"extra-{i}", "sensor")
+        except ShardFullError:
+            pass
+    moving = next(t for t, p in cluster.placement.items() if p["worker"] == source)
+    cluster.ring.remove_node(source)
+    with pytest.raises(ShardFullError):
+        cluster._migrate(moving, "full")
+    assert cluster.placement[moving]["worker"] == source
+    assert cluster.get_twin(moving)["kind"] == "sensor"
+
+
+def test_two_dead_workers_are_reaped_together():
+    with TwinCluster(workers=4, capacity=64, tick_interval=0.01, request_timeout=5.0) as cluster:
+        for i in range(40):
+            cluster.add_twin(f"line-{i}", "factory_line", size=3)
+        victims = list(cluster.workers)[:2]
+        for name in victims:
+            cluster.workers[name]["process"].kill()
+            cluster.workers[name]["process"].join(5)
+
+        for _ in range(3):
+            totals = cluster.aggregate()
+            assert totals["twins"]["factory_line"] == 40
+        assert not set(victims) & set(cluster.workers)
+        assert {p["worker"] for p in cluster.placement.values()} <= set(cluster.workers)
+
+
+def test_worker_that_fails_the_ping_is_never_routable(cluster, monkeypatch):
+    before = set(cluster.workers)
+    real_request = cluster._request
+
+    def failing_ping(worker, op, **payload):
+        if op == "ping":
+            raise TimeoutError(f"Worker {worker} did not answer 'ping'")
+        return real_request(worker, op, **payload)
+
+    monkeypatch.setattr(cluster, "_request", failing_ping)
+    with pytest.raises(TimeoutError):
+        cluster.add_worker("broken")
+    assert set(cluster.workers) == before
+    assert cluster.ring.nodes == before
+
+
+def test_last_worker_hosting_twins_cannot_be_removed():
+    with TwinCluster(workers=1, capacity=16, tick_interval=0.01, request_timeout=5.0) as cluster:
+        cluster.add_twin("s1", "sensor")
+        with pytest.raises(LastWorkerError):
+            cluster.remove_worker(next(iter(cluster.workers)))
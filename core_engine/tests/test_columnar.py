@@ -0,0 +1,88 @@
+import os
+import shutil
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from analytics import TelemetryExporter, load_telemetry
+
+START = datetime(2026, 9, 1, 22, 0)
+
+
+def _insert(db, first, count, step_s=600):
+    conn = sqlite3.connect(db)
+    conn.execute("""CREATE TABLE IF NOT EXISTS factory_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT,
+                    machine_id TEXT, status TEXT, consumption REAL, total_energy REAL, production_count INTEGER)""")
+    conn.executemany(
+        "INSERT INTO factory_logs (timestamp, machine_id, status, consumption, total_energy, production_count) VALUES (?,?,?,?,?,?)",
+        [((START + timedelta(seconds=(first + i) * step_s)).isoformat(), f"M{(first + i) % 3 + 1}", "IDLE", 0.5, 0.0, 0)
+         for i in range(count)])
+    conn.commit()
+    conn.close()
+
+
+def _files(lake, date):
+    return sorted(os.listdir(os.path.join(lake, f"date={date}")))
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_follow_mode_compacts_closed_partitions(tmp_path, fmt):
+    db, lake = str(tmp_path / "twin.db"), str(tmp_path / "lake")
+    exporter = TelemetryExporter(db, "factory_logs", lake, fmt=fmt)
+    for poll in range(20):  # 10-minute samples from 22:00: the first day closes at poll 12
+        _insert(db, poll, 1)
+        exporter.export_once()
+
+    assert _files(lake, "2026-09-01") == [f"part-{1:012d}-c.{fmt}"]
+    assert len(_files(lake, "2026-09-02")) == 8  # open day, under max_open_files
+    table = load_telemetry(lake, fmt=fmt)
+    assert sorted(table["id"].to_pylist()) == list(range(1, 21))
+    assert load_telemetry(lake, fmt=fmt, machine_id="M1").num_rows == 7
+
+
+def test_open_partition_is_compacted_past_max_open_files(tmp_path):
+    db, lake = str(tmp_path / "twin.db"), str(tmp_path / "lake")
+    exporter = TelemetryExporter(db, "factory_logs", lake, max_open_files=4)
+    for poll in range(5):
+        _insert(db, poll, 1, step_s=60)
+        exporter.export_once()
+    assert len(_files(lake, "2026-09-01")) == 1
+    assert load_telemetry(lake).num_rows == 5
+
+
+def test_compaction_drops_rows_duplicated_by_an_interrupted_run(tmp_path):
+    db, lake = str(tmp_path / "twin.db"), str(tmp_path / "lake")
+    exporter = TelemetryExporter(db, "factory_logs", lake)
+    _insert(db, 0, 6)  # 22:00 - 22:50
+    exporter.export_once()
+    folder = os.path.join(lake, "date=2026-09-01")
+    # Crash after the compacted file was written but before the parts were removed
+    part = os.path.join(folder, _files(lake, "2026-09-01")[0])
+    shutil.copy(part, os.path.join(folder, f"part-{1:012d}-c.parquet"))
+
+    _insert(db, 6, 13)  # rolls over to the next day: 2026-09-01 closes
+    exporter.export_once()
+    assert len(_files(lake, "2026-09-01")) == 1
+    assert sorted(load_telemetry(lake)["id"].to_pylist()) == list(range(1, 20))
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_all_null_batch_keeps_the_declared_column_type(tmp_path, fmt):
+    db, lake = str(tmp_path / "dto.db"), str(tmp_path / "lake")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE readings (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, "
+                 "temperature REAL, is_anomaly INTEGER)")
+    conn.commit()
+    exporter = TelemetryExporter(db, "readings", lake, fmt=fmt)
+    # A poll where temperature is all NULL, a normal one, then the day closes and is compacted
+    for ts, temp in (("2026-09-01T10:00:00", None), ("2026-09-01T11:00:00", 22.5), ("2026-09-02T00:10:00", 21.0)):
+        conn.execute("INSERT INTO readings (timestamp, temperature, is_anomaly) VALUES (?, ?, 0)", (ts, temp))
+        conn.commit()
+        exporter.export_once()
+    conn.close()
+
+    assert len(_files(lake, "2026-09-01")) == 1
+    table = load_telemetry(lake, fmt=fmt)
+    assert str(table.schema.field("temperature").type) == "double"
+    assert sorted(table["temperature"].to_pylist(), key=lambda v: (v is not None, v)) == [None, 21.0, 22.5]
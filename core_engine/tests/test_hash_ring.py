@@ -0,0 +1,29 @@
+from sharding import ConsistentHashRing
+
+
+def test_get_node_is_stable_and_covers_all_nodes():
+    ring = ConsistentHashRing(["a", "b", "c"])
+    owners = {f"twin-{i}": ring.get_node(f"twin-{i}") for i in range(3000)}
+    assert set(owners.values()) == {"a", "b", "c"}
+    assert all(ring.get_node(k) == v for k, v in owners.items())
+
+
+def test_adding_a_node_moves_about_one_nth_of_the_keys():
+    ring = ConsistentHashRing(["a", "b", "c"])
+    keys = [f"twin-{i}" for i in range(20000)]
+    before = {k: ring.get_node(k) for k in keys}
+    ring.add_node("d")
+    moved = [k for k in keys if ring.get_node(k) != before[k]]
+    assert 0.15 < len(moved) / len(keys) < 0.35  # ideal 1/4
+    # Keys only ever move onto the new node
+    assert all(ring.get_node(k) == "d" for k in moved)
+
+
+def test_remove_node_returns_keys_to_previous_owners():
+    ring = ConsistentHashRing(["a", "b", "c"])
+    keys = [f"twin-{i}" for i in range(2000)]
+    before = {k: ring.get_node(k) for k in keys}
+    ring.add_node("d")
+    ring.remove_node("d")
+    assert {k: ring.get_node(k) for k in keys} == before
+    assert ConsistentHashRing().get_node("x") is None
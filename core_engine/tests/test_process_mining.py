@@ -0,0 +1,95 @@
+import os
+import sqlite3
+
+import pytest
+
+from analytics import ProcessMiner, BPALogSource, FactoryLogSource, MiningSession
+from analytics.process_mining import START, END
+
+# Two cases of a hand-written log: order -> pick -> pack, with a repeated status poll
+EVENTS = [
+    ("c1", "order", 0), ("c1", "pick", 10), ("c1", "pick", 12), ("c1", "pack", 40),
+    ("c2", "order", 5), ("c2", "pick", 25), ("c2", "pack", 45),
+]
+
+
+def test_dfg_edges_and_counts():
+    miner = ProcessMiner().ingest_many(EVENTS)
+    edges = {(e["from"], e["to"]): e["count"] for e in miner.dfg()["edges"]}
+    assert edges == {(START, "order"): 2, ("order", "pick"): 2, ("pick", "pack"): 2}
+    assert miner.dfg()["nodes"] == {"order": 2, "pick": 2, "pack": 2}  # repeated "pick" collapsed
+
+
+def test_sojourn_times_and_ranking():
+    miner = ProcessMiner().ingest_many(EVENTS)
+    spent = {row["activity"]: row for row in miner.where_is_time_spent()}
+    assert spent["order"]["total"] == pytest.approx(30, rel=0.01)  # 10 + 20
+    assert spent["pick"]["total"] == pytest.approx(50, rel=0.01)   # 30 + 20
+    assert [row["activity"] for row in miner.where_is_time_spent()] == ["pick", "order"]
+    assert miner.bottlenecks(top=1)[0]["from"] == "pick"
+
+
+def test_cases_close_on_timeout_and_lru_cap():
+    miner = ProcessMiner(case_timeout_s=100).ingest_many(EVENTS + [("c3", "order", 500)])
+    assert miner.cases_closed == 2
+    assert miner.edge_counts[("pack", END)] == 2
+    capped = ProcessMiner(max_open_cases=1).ingest_many(EVENTS)
+    assert len(capped.open_cases) == 1
+
+
+def _append_bpa(path, lines):
+    with open(path, "a", encoding="utf-8") as f:
+        for ts, action in lines:
+            f.write(f"[2026-10-19 {ts}] BPA ACTION: {action} | details\n")
+
+
+def test_session_resumes_from_saved_offsets(tmp_path):
+    log, db, state = str(tmp_path / "bpa.log"), str(tmp_path / "factory.db"), str(tmp_path / "state.pkl")
+    _append_bpa(log, [("10:00:00", "COOLING_ON"), ("10:00:30", "NOTIFY")])
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE factory_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, machine_id TEXT, status TEXT)")
+    conn.executemany("INSERT INTO factory_logs (timestamp, machine_id, status) VALUES (?,?,?)",
+                     [("2026-10-19T10:00:00", "M1", "IDLE"), ("2026-10-19T10:00:05", "M1", "WORKING")])
+    conn.commit()
+
+    session = MiningSession()
+    session.attach("bpa", BPALogSource(log))
+    session.attach("factory", FactoryLogSource(db))
+    assert session.poll() == {"bpa": 2, "factory": 2}
+    session.save(state)
+
+    _append_bpa(log, [("10:01:00", "COOLING_OFF")])
+    conn.execute("INSERT INTO factory_logs (timestamp, machine_id, status) VALUES ('2026-10-19T10:00:09', 'M1', 'IDLE')")
+    conn.commit()
+    conn.close()
+
+    restored = MiningSession.load(state)
+    restored.attach("bpa", BPALogSource(log))  # same origin: the saved cursor is kept
+    restored.attach("factory", FactoryLogSource(db))
+    assert restored.poll() == {"bpa": 1, "factory": 1}
+    report = restored.report()
+    assert report["bpa"]["summary"]["events"] == 3
+    assert report["factory"]["summary"]["events"] == 3
+    assert {r["activity"] for r in report["factory"]["where_is_time_spent"]} == {"IDLE", "WORKING"}
+
+
+def test_session_restarts_a_stream_whose_origin_changed(tmp_path):
+    log, other = str(tmp_path / "a.log"), str(tmp_path / "b.log")
+    _append_bpa(log, [("10:00:00", "COOLING_ON")])
+    _append_bpa(other, [("11:00:00", "NOTIFY")])
+    session = MiningSession()
+    session.attach("bpa", BPALogSource(log))
+    session.poll()
+    session.attach("bpa", BPALogSource(other))
+    assert session.poll() == {"bpa": 1}
+    assert session.report()["bpa"]["summary"]["events"] == 1
+
+
+def test_truncated_log_is_read_from_the_start(tmp_path):
+    log = str(tmp_path / "bpa.log")
+    _append_bpa(log, [("10:00:00", "COOLING_ON"), ("10:00:30", "NOTIFY")])
+    source = BPALogSource(log)
+    assert len(source.poll()) == 2
+    os.remove(log)
+    _append_bpa(log, [("12:00:00", "COOLING_OFF")])
+    assert [e[1] for e in source.poll()] == ["COOLING_OFF"]
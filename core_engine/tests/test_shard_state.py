@@ -0,0 +1,56 @@
+import threading
+
+import numpy as np
+import pytest
+
+from sharding.shard_state import ShardState, HDR_SEQ, HDR_TICKS
+
+
+@pytest.fixture
+def state():
+    state = ShardState.create(capacity=64)
+    yield state
+    state.close()
+
+
+def test_snapshot_is_a_copy(state):
+    state.table[3, 1] = 42.0
+    table, header = state.snapshot()
+    state.table[3, 1] = 0.0
+    assert table[3, 1] == 42.0
+    rows, _ = state.snapshot(rows=[3])
+    assert rows.shape == (1, state.table.shape[1])
+
+
+def test_snapshot_waits_for_writer_and_times_out_while_write_is_open(state):
+    state.begin_write()
+    assert state.header[HDR_SEQ] % 2 == 1
+    with pytest.raises(RuntimeError):
+        state.snapshot(timeout=0.05)
+    state.end_write()
+    state.snapshot(timeout=0.05)
+
+
+def test_snapshot_never_sees_a_torn_table(state):
+    stop = threading.Event()
+
+    def writer():
+        value = 0.0
+        while not stop.is_set():
+            value += 1
+            state.begin_write()
+            state.table[:] = value
+            state.header[HDR_TICKS] = int(value)
+            state.end_write()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(200):
+            table, header = state.snapshot(timeout=5.0)
+            # Every cell comes from the same publish, and matches the header
+            assert np.all(table == table[0, 0])
+            assert int(table[0, 0]) == header[HDR_TICKS]
+    finally:
+        stop.set()
+        thread.join()
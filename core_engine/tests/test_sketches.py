@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+import pytest
+
+from analytics import QuantileSketch
+
+
+def test_quantiles_are_within_relative_accuracy():
+    random.seed(0)
+    values = [random.lognormvariate(0, 1.5) for _ in range(20000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for v in values:
+        sketch.add(v)
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exact = float(np.quantile(values, q, method="lower"))
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+    assert sketch.count == len(values)
+    assert sketch.mean == pytest.approx(np.mean(values))
+    assert sketch.quantile(1.0) == pytest.approx(max(values))
+
+
+def test_merge_equals_a_single_sketch_over_both_streams():
+    random.seed(1)
+    a, b, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i in range(5000):
+        v = random.expovariate(1 / 30)
+        (a if i % 2 else b).add(v)
+        both.add(v)
+    a.merge(b)
+    assert a.count == both.count
+    assert a.buckets == both.buckets
+    for q in (0.5, 0.95, 0.99):
+        assert a.quantile(q) == both.quantile(q)
+
+
+def test_zero_values_and_bucket_budget():
+    values = [0.0] * 10 + [10 ** (i / 10) for i in range(200)]
+    sketch = QuantileSketch(max_buckets=16)
+    for v in values:
+        sketch.add(v)
+    assert len(sketch.buckets) <= 16
+    assert sketch.quantile(0.0) == 0.0
+    # Collapsing only merges the lowest buckets: the tail keeps its accuracy
+    assert sketch.quantile(0.99) == pytest.approx(float(np.quantile(values, 0.99, method="lower")), rel=0.02)
+    assert QuantileSketch().summary() == {"count": 0}
@@ -0,0 +1,90 @@
+import argparse
+import os
+import time
+
+import pytest
+
+from benchmarks import socketio_soak
+from benchmarks.socketio_soak import DashboardClient, HttpStats, build_report
+
+
+def _client(budget_ms=1000):
+    client = DashboardClient("http://localhost:0", "factory_update", None, budget_ms)
+    client.recording = True
+    return client
+
+
+def _args(**overrides):
+    args = dict(app="factory", async_mode="threading", url=None, clients=2, pollers=0, poll_rate=1.0,
+                actuation_rate=0.0, transport=None, keep_workdir=False)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def test_frames_before_recording_are_ignored():
+    client = _client()
+    client.recording = False
+    client._on_frame({"seq": 1, "tick_ms": 5000})
+    assert (client.frames, client.overruns, client.last_seq) == (0, 0, None)
+
+
+def test_seq_gaps_and_out_of_order_frames():
+    client = _client()
+    for seq in (1, 2, 5, 4, 6, 6):
+        client._on_frame({"seq": seq})
+    assert client.frames == 6
+    assert client.dropped == 2        # 3 and 4 missing when 5 arrived
+    assert client.out_of_order == 2   # the late 4 and the repeated 6
+    assert client.last_seq == 6
+
+
+def test_tick_overruns_and_latency():
+    client = _client(budget_ms=1000)
+    now = time.time()
+    for tick_ms in (10.0, 999.0, 1000.5, 2500.0):
+        client._on_frame({"tick_ms": tick_ms, "emitted_at": now - 0.05})
+    assert client.overruns == 2
+    assert client.tick_ms.count == 4
+    assert 50 <= client.latency_ms.summary()["p50"] < 1000
+
+
+def test_report_delivery_ratio_and_rss_growth():
+    clients = [_client(), _client()]
+    for seq in range(1, 10):
+        clients[0]._on_frame({"seq": seq, "tick_ms": 20.0})
+    for seq in range(1, 10, 2):
+        clients[1]._on_frame({"seq": seq})
+    memory = [(0.0, 100.0), (900.0, 104.0), (1800.0, 110.0)]
+
+    report = build_report(_args(), 1.0, "http://localhost:5001", 10.0, clients, HttpStats(), HttpStats(), memory)
+    sio = report["socketio"]
+    assert (sio["frames_expected"], sio["frames_received"], sio["dropped_frames"]) == (20, 14, 4)
+    assert sio["delivery_ratio"] == 0.7
+    assert report["server_tick"]["tick_ms"]["count"] == 9  # the client that saw every tick
+    assert report["memory"]["growth_mb_per_hour"] == 20.0
+    assert (report["memory"]["rss_start_mb"], report["memory"]["rss_peak_mb"]) == (100.0, 110.0)
+
+
+def test_report_without_memory_samples():
+    report = build_report(_args(clients=1), 1.0, "http://x", 5.0, [_client()], HttpStats(), HttpStats(), [])
+    assert report["memory"]["growth_mb_per_hour"] is None
+    assert report["socketio"]["delivery_ratio"] == 0.0
+
+
+@pytest.mark.parametrize("keep", [False, True])
+def test_scratch_directory_is_removed_unless_kept(tmp_path, monkeypatch, keep):
+    workdir = tmp_path / "dtf_soak_run"
+
+    def mkdtemp(prefix=""):
+        workdir.mkdir()
+        (workdir / "factory_twin.db").write_text("")
+        return str(workdir)
+
+    def not_ready(url, process=None, timeout=60):
+        raise TimeoutError(f"Server not ready at {url}")
+
+    monkeypatch.setattr(socketio_soak.tempfile, "mkdtemp", mkdtemp)
+    monkeypatch.setattr(socketio_soak, "wait_ready", not_ready)
+    with pytest.raises(TimeoutError):
+        socketio_soak.run_soak(_args(url="http://localhost:1", keep_workdir=keep, tick_interval=None))
+    assert os.path.isdir(workdir) == keep